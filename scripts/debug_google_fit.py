@@ -4,13 +4,25 @@
 import json
 import sys
 from datetime import datetime, timezone, timedelta
-import boto3
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-def get_credentials(user_id: str) -> Credentials:
+# boto3 and the Google client libraries are imported where used so that
+# usage errors print without paying their import cost
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+@lru_cache(maxsize=None)
+def get_ssm_client():
+    """Return a shared SSM client so credential resolution happens once."""
+    import boto3
+    return boto3.client('ssm')
+
+def get_credentials(user_id: str) -> 'Credentials':
     """Retrieve Google API credentials from SSM Parameter Store."""
-    ssm = boto3.client('ssm')
+    from google.oauth2.credentials import Credentials
+
+    ssm = get_ssm_client()
     token_param = f"/life-stats/google-fit/{user_id}/token"
     response = ssm.get_parameter(Name=token_param, WithDecryption=True)
     creds = json.loads(response['Parameter']['Value'])
@@ -26,6 +38,8 @@ def get_credentials(user_id: str) -> Credentials:
 
 def fetch_steps(user_id: str, start_date: str, end_date: str):
     """Fetch steps data from Google Fit API."""
+    from googleapiclient.discovery import build
+
     credentials = get_credentials(user_id)
     service = build('fitness', 'v1', credentials=credentials)
     
@@ -5,13 +5,19 @@ Generate Google Fit OAuth token using manual authorization code.
 import sys
 import json
 import boto3
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
+@lru_cache(maxsize=None)
+def get_ssm_client():
+    """Return a shared SSM client for reading and storing credentials."""
+    return boto3.client('ssm', region_name='us-west-2')
+
 def get_credentials_from_ssm():
     """Get client ID and secret from SSM."""
-    ssm = boto3.client('ssm', region_name='us-west-2')
+    ssm = get_ssm_client()
     
     client_id = ssm.get_parameter(
         Name='/life-stats/google-fit/client-id',
@@ -89,7 +95,7 @@ def main():
     # Store token in SSM
     print(f"Storing credentials in SSM for user '{user_id}'...")
     
-    ssm = boto3.client('ssm', region_name='us-west-2')
+    ssm = get_ssm_client()
     
     creds_data = {
         'token': token_data['access_token'],
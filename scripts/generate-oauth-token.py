@@ -5,6 +5,7 @@ This script will open a browser for you to authorize access.
 """
 import os
 import sys
+from functools import lru_cache
 from google_auth_oauthlib.flow import InstalledAppFlow
 import boto3
 
@@ -13,9 +14,14 @@ SCOPES = [
     'https://www.googleapis.com/auth/fitness.body.read',
 ]
 
+@lru_cache(maxsize=None)
+def get_ssm_client():
+    """Return a shared SSM client for reading and storing credentials."""
+    return boto3.client('ssm', region_name='us-west-2')
+
 def get_credentials_from_ssm():
     """Get client ID and secret from SSM."""
-    ssm = boto3.client('ssm', region_name='us-west-2')
+    ssm = get_ssm_client()
     
     client_id = ssm.get_parameter(
         Name='/life-stats/google-fit/client-id',
@@ -67,7 +73,7 @@ def main():
     print(f"\n✓ Authorization successful!")
     print(f"Storing credentials in SSM for user '{user_id}'...")
     
-    ssm = boto3.client('ssm', region_name='us-west-2')
+    ssm = get_ssm_client()
     
     # Store as JSON with refresh token
     import json
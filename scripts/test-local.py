@@ -6,10 +6,11 @@ Allows testing without deploying to AWS.
 import sys
 import os
 import json
-from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+# Add src to path (once, even if the script is imported again)
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 # Mock environment variables
 os.environ.setdefault('METRICS_TABLE', 'life-stats-metrics')
@@ -1,49 +1,102 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone
 
+DateInput = Union[str, datetime, None]
+
+# Per-user data points, or the exception raised while fetching them
+FetchOutcome = Union[List[Dict[str, Any]], Exception]
+
+
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp, accepting a trailing 'Z' for UTC."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def parse_since(since: DateInput) -> Optional[datetime]:
+    """
+    Resolve a fetch start value to a datetime.
+
+    A YYYY-MM-DD string (manual override) means midnight UTC of that day. Any other
+    string is treated as a last_run ISO timestamp and resolves to midnight of the
+    previous day. Datetimes and None are returned unchanged.
+    """
+    if not isinstance(since, str):
+        return since
+    try:
+        return datetime.strptime(since, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        last_run = _parse_iso(since)
+        return (last_run - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_until(until: DateInput) -> Optional[datetime]:
+    """
+    Resolve a fetch end value to a datetime.
+
+    A YYYY-MM-DD string means 23:59:59 UTC of that day; any other string is parsed
+    as an ISO timestamp. Datetimes and None are returned unchanged.
+    """
+    if not isinstance(until, str):
+        return until
+    try:
+        return datetime.strptime(until, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+    except ValueError:
+        return _parse_iso(until)
+
 
 class BaseIntegration(ABC):
     """Base class for all metric integrations."""
 
+    FETCH_WORKERS = 8  # Concurrent users per integration in the default fetch_many
+
     def __init__(self, user_id: str):
         self.user_id = user_id
 
     @abstractmethod
-    def fetch_data(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    def fetch_data(self, since: DateInput = None, until: DateInput = None) -> List[Dict[str, Any]]:
         """
         Fetch metric data from external API.
 
         Args:
-            since: ISO timestamp of last run. If None, fetch last 7 days.
-            until: ISO timestamp or YYYY-MM-DD for end date. If None, use now.
+            since: Start of the window. A datetime (as resolved by the handler), an ISO
+                timestamp of last run or YYYY-MM-DD. If None, fetch last 7 days.
+            until: End of the window. A datetime, ISO timestamp or YYYY-MM-DD. If None, use now.
 
         Returns:
             List of data points: [{'date': 'YYYY-MM-DD', 'value': float, 'timestamp': str}, ...]
         """
         pass
 
-    def _get_date_range(self, since: Optional[str] = None, until: Optional[str] = None) -> Tuple[datetime, datetime]:
-        """Calculate date range for data fetch."""
-        if until:
-            # Parse until date (could be YYYY-MM-DD or ISO timestamp)
-            try:
-                end_date = datetime.strptime(until, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
-            except ValueError:
-                end_date = datetime.fromisoformat(until.replace('Z', '+00:00'))
-        else:
-            end_date = datetime.now(timezone.utc)
+    @classmethod
+    def fetch_many(cls, jobs: List[Tuple['BaseIntegration', DateInput]],
+                   until: DateInput = None) -> List[FetchOutcome]:
+        """
+        Fetch data for several users of this integration at once.
 
-        if since:
+        Args:
+            jobs: (integration instance, since) pairs, one per user.
+            until: Shared end of the window, as for fetch_data.
+
+        Returns:
+            One outcome per job, in order: the data points, or the exception raised.
+            Integrations whose API supports batching override this; the default runs
+            fetch_data for each job concurrently.
+        """
+        def run(job: Tuple['BaseIntegration', DateInput]) -> FetchOutcome:
+            integration, since = job
             try:
-                # Try parsing as YYYY-MM-DD first (manual override)
-                start_date = datetime.strptime(since, '%Y-%m-%d').replace(hour=0, minute=0, second=0, tzinfo=timezone.utc)
-            except ValueError:
-                # ISO timestamp from last_run - fetch previous day at midnight
-                last_run = datetime.fromisoformat(since.replace('Z', '+00:00'))
-                start_date = (last_run - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            # First run: fetch last 7 days
-            start_date = end_date - timedelta(days=7)
+                return integration.fetch_data(since, until)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(cls.FETCH_WORKERS, len(jobs)))) as executor:
+            return list(executor.map(run, jobs))
 
+    def _get_date_range(self, since: DateInput = None, until: DateInput = None) -> Tuple[datetime, datetime]:
+        """Calculate date range for data fetch, filling in defaults."""
+        end_date = parse_until(until) or datetime.now(timezone.utc)
+        # First run: fetch last 7 days
+        start_date = parse_since(since) or end_date - timedelta(days=7)
         return start_date, end_date
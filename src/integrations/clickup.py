@@ -1,209 +1,278 @@
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Any, Tuple
+from datetime import datetime, timezone
 from decimal import Decimal
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+import logging
+import time
 import requests
-from integrations.base import BaseIntegration
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from integrations.base import BaseIntegration, DateInput
 from utils.logger import setup_logger
+from utils.ssm import get_parameters
 
 logger = setup_logger(__name__)
 
+# Custom task types change rarely, so share them (and their metric keys) per team across instances
+_CUSTOM_TYPES_CACHE: Dict[str, Tuple[float, Dict[int, str], Dict[int, str]]] = {}
+_CUSTOM_TYPES_TTL = 3600  # seconds
+
+MS_PER_DAY = 86_400_000
+MS_PER_CENTIHOUR = 36_000
+
+
+@lru_cache(maxsize=1024)
+def _day_to_date_str(day: int) -> str:
+    """Format a UTC day index (days since the epoch) as YYYY-MM-DD."""
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime('%Y-%m-%d')
+
 
 class ClickUpTasksIntegration(BaseIntegration):
     """ClickUp tasks integration - fetches completed tasks and calculates time spent per task type."""
 
+    PAGE_SIZE = 100  # ClickUp returns at most 100 tasks per page
+    PAGE_PREFETCH = 5  # Pages requested concurrently once a list spans more than one page
+
     def __init__(self, user_id: str):
         super().__init__(user_id)
-        self.ssm = boto3.client('ssm')
-        self.api_token = self._get_api_token()
-        self.list_id = self._get_list_id()
-        self.team_id = self._get_team_id()
         self.base_url = "https://api.clickup.com/api/v2"
-        self.custom_types = self._get_custom_types()
 
-    def _get_api_token(self) -> str:
-        """Retrieve ClickUp API token from SSM."""
-        try:
-            response = self.ssm.get_parameter(
-                Name=f"/life-stats/clickup/{self.user_id}/token",
-                WithDecryption=True
-            )
-            return response['Parameter']['Value']
-        except Exception as e:
-            logger.error(f"Failed to retrieve ClickUp API token: {e}")
-            raise
+    # Config and session are loaded on first use rather than in __init__
+    @cached_property
+    def _config(self) -> Tuple[str, str, str]:
+        return self._load_config()
 
-    def _get_list_id(self) -> str:
-        """Retrieve ClickUp List ID from SSM."""
-        try:
-            response = self.ssm.get_parameter(
-                Name=f"/life-stats/clickup/{self.user_id}/list-id",
-                WithDecryption=False
-            )
-            return response['Parameter']['Value']
-        except Exception as e:
-            logger.error(f"Failed to retrieve ClickUp List ID: {e}")
-            raise
+    @cached_property
+    def api_token(self) -> str:
+        return self._config[0]
+
+    @cached_property
+    def list_id(self) -> str:
+        return self._config[1]
 
-    def _get_team_id(self) -> str:
-        """Retrieve ClickUp Team ID from SSM."""
+    @cached_property
+    def team_id(self) -> str:
+        return self._config[2]
+
+    @cached_property
+    def _session(self) -> requests.Session:
+        # Pooled keep-alive session so repeated calls skip the TCP+TLS handshake
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": self.api_token,
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        })
+        # Concurrent page fetches can trip ClickUp's per-token rate limit; back off and retry those
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429],
+            allowed_methods=["GET"]
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=4, pool_maxsize=10)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def custom_types(self) -> Dict[int, str]:
+        # Read through the TTL cache each time so a failed lookup is retried, never kept
+        return self._get_custom_types()[0]
+
+    def _load_config(self) -> Tuple[str, str, str]:
+        """Retrieve ClickUp API token, List ID and Team ID from SSM in a single call."""
+        prefix = f"/life-stats/clickup/{self.user_id}"
+        names = [f"{prefix}/token", f"{prefix}/list-id", f"{prefix}/team-id"]
         try:
-            response = self.ssm.get_parameter(
-                Name=f"/life-stats/clickup/{self.user_id}/team-id",
-                WithDecryption=False
-            )
-            return response['Parameter']['Value']
+            values = get_parameters(names, decrypt=True)
         except Exception as e:
-            logger.error(f"Failed to retrieve ClickUp Team ID: {e}")
+            logger.error("Failed to retrieve ClickUp configuration: %s", e)
             raise
+        return values[names[0]], values[names[1]], values[names[2]]
+
+    def _get_custom_types(self) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """
+        Fetch custom task types from ClickUp API, reusing types cached within the TTL.
+
+        Returns the type names by item ID alongside the normalized metric_type for each ID.
+        If the request fails, empty lookups are returned without being cached.
+        """
+        cached = _CUSTOM_TYPES_CACHE.get(self.team_id)
+        if cached and time.monotonic() - cached[0] < _CUSTOM_TYPES_TTL:
+            return cached[1], cached[2]
 
-    def _get_custom_types(self) -> Dict[int, str]:
-        """Fetch custom task types from ClickUp API."""
         try:
             response = self._make_request(f"/team/{self.team_id}/custom_item")
             custom_types = {}
             for item in response.get('custom_items', []):
                 custom_types[item['id']] = item['name']
-            logger.info(f"Loaded {len(custom_types)} custom task types")
-            return custom_types
+            metric_keys = {item_id: name.lower().replace(' ', '_') for item_id, name in custom_types.items()}
+            logger.info("Loaded %s custom task types", len(custom_types))
+            _CUSTOM_TYPES_CACHE[self.team_id] = (time.monotonic(), custom_types, metric_keys)
+            return custom_types, metric_keys
         except Exception as e:
-            logger.error(f"Failed to fetch custom task types: {e}")
-            return {}
+            logger.error("Failed to fetch custom task types: %s", e)
+            return {}, {}
 
     def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
         """Make authenticated request to ClickUp API."""
-        headers = {
-            "Authorization": self.api_token,
-            "Content-Type": "application/json"
-        }
         url = f"{self.base_url}{endpoint}"
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, params=params)
         response.raise_for_status()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s: %s, %s bytes on the wire, %s bytes decoded",
+                endpoint,
+                response.headers.get('Content-Encoding', 'identity'),
+                response.headers.get('Content-Length', '?'),
+                len(response.content)
+            )
         return response.json()
 
-    def _calculate_duration_hours(self, start_time: int, end_time: int) -> float:
-        """Calculate duration in hours from millisecond timestamps."""
+    def _fetch_page(self, params: Dict, page: int) -> List[Dict]:
+        """Fetch a single page of tasks from the list."""
+        response = self._make_request(f"/list/{self.list_id}/task", {**params, "page": page})
+        return response.get('tasks', [])
+
+    def _fetch_all_tasks(self, params: Dict) -> List[Dict]:
+        """Fetch every page of tasks, requesting later pages in concurrent batches."""
+        tasks = self._fetch_page(params, 0)
+        if len(tasks) < self.PAGE_SIZE:
+            return tasks
+
+        next_page = 1
+        with ThreadPoolExecutor(max_workers=self.PAGE_PREFETCH) as executor:
+            while True:
+                pages = range(next_page, next_page + self.PAGE_PREFETCH)
+                for page_tasks in executor.map(lambda page: self._fetch_page(params, page), pages):
+                    tasks.extend(page_tasks)
+                    if len(page_tasks) < self.PAGE_SIZE:
+                        return tasks
+                next_page += self.PAGE_PREFETCH
+
+    def _calculate_duration_centihours(self, start_time: int, end_time: int) -> int:
+        """Calculate duration in hundredths of an hour (rounded half up) from millisecond timestamps."""
         duration_ms = end_time - start_time
-        duration_hours = duration_ms / (1000 * 60 * 60)
-        return round(duration_hours, 2)
+        return (duration_ms + MS_PER_CENTIHOUR // 2) // MS_PER_CENTIHOUR
 
-    def _split_task_by_day(self, task: Dict) -> List[Dict]:
-        """Split task into separate entries if it spans multiple days."""
+    def _split_task_by_day(self, task: Dict) -> List[Tuple[int, int, Dict]]:
+        """Split task into (start_ms, end_ms, task) spans if it spans multiple days."""
         start_ms = int(task['start_date'])
         end_ms = int(task['date_done'])
 
-        start_dt = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
-        end_dt = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)
+        start_day = start_ms // MS_PER_DAY
+        end_day = end_ms // MS_PER_DAY
 
         # Check if same day
-        if start_dt.date() == end_dt.date():
-            return [task]
-
-        # Split across days
-        split_tasks = []
-        current_start = start_dt
-
-        while current_start.date() <= end_dt.date():
-            day_end = current_start.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-            if day_end > end_dt:
-                day_end = end_dt
-
-            split_task = task.copy()
-            split_task['start_date'] = str(int(current_start.timestamp() * 1000))
-            split_task['date_done'] = str(int(day_end.timestamp() * 1000))
-            split_tasks.append(split_task)
+        if start_day == end_day:
+            return [(start_ms, end_ms, task)]
+
+        # Split across days at UTC midnight boundaries
+        return [
+            (max(start_ms, day * MS_PER_DAY), min(end_ms, (day + 1) * MS_PER_DAY - 1), task)
+            for day in range(start_day, end_day + 1)
+        ]
+
+    def _group_tasks(self, tasks: List[Dict], range_start_ms: int,
+                     range_end_ms: int) -> Tuple[List[Tuple[int, str]], List[int], List[set]]:
+        """
+        Total task time per (UTC day, metric type) within the requested range.
+
+        Returns parallel lists of group keys, centihours and tag sets.
+        """
+        # Group by (UTC day, metric type) as parallel per-group columns; the dict
+        # only maps each key to its slot, and dates are formatted once per group
+        slots: Dict[Tuple[int, str], int] = {}
+        group_keys: List[Tuple[int, str]] = []
+        group_centihours: List[int] = []
+        group_tags: List[set] = []
+        # Task types are only needed (and requested) once there are tasks to label
+        metric_keys = self._get_custom_types()[1] if tasks else {}
+
+        for task in tasks:
+            # Skip tasks without required fields
+            if not task.get('start_date') or not task.get('date_done'):
+                logger.debug("Skipping task %s - missing start/end time", task.get('id'))
+                continue
+
+            # Metric type and tags are shared by every split of the task
+            metric_type = metric_keys.get(task.get('custom_item_id'), 'unknown')
+            tags = frozenset(tag['name'] for tag in task.get('tags', []))
+
+            # Most tasks start and finish on the same UTC day; only split the rest
+            start_ms = int(task['start_date'])
+            end_ms = int(task['date_done'])
+            if start_ms // MS_PER_DAY == end_ms // MS_PER_DAY:
+                spans = ((start_ms, end_ms, task),)
+            else:
+                spans = self._split_task_by_day(task)
+
+            for start_ms, end_ms, _ in spans:
+                # Multi-day tasks finished in range may have started before it
+                if start_ms < range_start_ms or start_ms > range_end_ms:
+                    continue
 
-            # Move to next day
-            current_start = (current_start + timedelta(days=1)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
+                key = (start_ms // MS_PER_DAY, metric_type)
+                slot = slots.get(key)
+                if slot is None:
+                    slot = slots[key] = len(group_keys)
+                    group_keys.append(key)
+                    group_centihours.append(0)
+                    group_tags.append(set())
+                group_centihours[slot] += self._calculate_duration_centihours(start_ms, end_ms)
+                group_tags[slot] |= tags
 
-        return split_tasks
+        return group_keys, group_centihours, group_tags
 
-    def fetch_data(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    def fetch_data(self, since: DateInput = None, until: DateInput = None) -> List[Dict[str, Any]]:
         """Fetch completed tasks from ClickUp and group by task type and date."""
         start_date, end_date = self._get_date_range(since, until)
 
-        logger.info(f"Fetching ClickUp tasks for {self.user_id} from {start_date} to {end_date}")
+        logger.info("Fetching ClickUp tasks for %s from %s to %s", self.user_id, start_date, end_date)
+
+        range_start_ms = int(start_date.timestamp() * 1000)
+        range_end_ms = int(end_date.timestamp() * 1000)
 
         try:
-            # Fetch tasks from list with status filter
+            # Fetch tasks from list with status filter, letting ClickUp drop tasks done
+            # before the window (the bound is exclusive, so widen by 1ms). There is no
+            # upper bound: a task started in range but done after it still has in-range hours
             params = {
                 "archived": "false",
                 "include_closed": "true",
-                "statuses[]": "done"
+                "statuses[]": "done",
+                "date_done_gt": range_start_ms - 1
             }
 
-            response = self._make_request(f"/list/{self.list_id}/task", params)
-            tasks = response.get('tasks', [])
-
-            logger.info(f"Fetched {len(tasks)} completed tasks from ClickUp")
-
-            # Group by task type and date
-            grouped_data = {}
-
-            for task in tasks:
-                # Skip tasks without required fields
-                if not task.get('start_date') or not task.get('date_done'):
-                    logger.debug(f"Skipping task {task.get('id')} - missing start/end time")
-                    continue
+            tasks = self._fetch_all_tasks(params)
 
-                # Split task if it spans multiple days
-                split_tasks = self._split_task_by_day(task)
+            logger.info("Fetched %s completed tasks from ClickUp", len(tasks))
 
-                for split_task in split_tasks:
-                    start_ms = int(split_task['start_date'])
-                    end_ms = int(split_task['date_done'])
+            group_keys, group_centihours, group_tags = self._group_tasks(tasks, range_start_ms, range_end_ms)
 
-                    task_date = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
-
-                    # Filter by date range
-                    if task_date < start_date or task_date > end_date:
-                        continue
-
-                    date_str = task_date.strftime('%Y-%m-%d')
-
-                    # Get task type from custom_item_id
-                    custom_item_id = split_task.get('custom_item_id')
-                    task_type = self.custom_types.get(custom_item_id, 'unknown')
-
-                    tags = [tag['name'] for tag in split_task.get('tags', [])]
-
-                    # Calculate duration
-                    duration = self._calculate_duration_hours(start_ms, end_ms)
-
-                    # Create key for grouping
-                    key = (date_str, task_type)
-
-                    if key not in grouped_data:
-                        grouped_data[key] = {
-                            'date': date_str,
-                            'task_type': task_type,
-                            'total_hours': 0,
-                            'tags': set()
-                        }
-
-                    grouped_data[key]['total_hours'] += duration
-                    grouped_data[key]['tags'].update(tags)
-
-            # Convert to output format
-            data_points = []
-            for (date_str, task_type), data in grouped_data.items():
-                data_points.append({
-                    'date': date_str,
-                    'metric_type': task_type.lower().replace(' ', '_'),
+            # Convert to output format; every row from this fetch shares one ingest time
+            ingested_at = datetime.now(timezone.utc).isoformat()
+            data_points = [
+                {
+                    'date': _day_to_date_str(day),
+                    'metric_type': metric_type,
                     'value': {
-                        'hours': Decimal(str(round(data['total_hours'], 2))),
-                        'tags': sorted(list(data['tags']))
+                        'hours': Decimal(centihours) / 100,
+                        'tags': sorted(tags)
                     },
-                    'timestamp': datetime.now(timezone.utc).isoformat()
-                })
-                logger.debug(f"Task type '{task_type}' on {date_str}: {data['total_hours']} hours")
-
-            logger.info(f"Successfully processed {len(data_points)} task type/date combinations")
+                    'timestamp': ingested_at
+                }
+                for (day, metric_type), centihours, tags in zip(group_keys, group_centihours, group_tags)
+            ]
+            if logger.isEnabledFor(logging.DEBUG):
+                for point in data_points:
+                    logger.debug("Task type '%s' on %s: %s hours",
+                                 point['metric_type'], point['date'], point['value']['hours'])
+
+            logger.info("Successfully processed %s task type/date combinations", len(data_points))
             return data_points
 
         except Exception as e:
-            logger.error(f"Error fetching ClickUp data: {e}", exc_info=True)
+            logger.error("Error fetching ClickUp data: %s", e)
             raise
@@ -1,14 +1,19 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
-import boto3
+import orjson
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from integrations.base import BaseIntegration
+from integrations.base import BaseIntegration, DateInput, FetchOutcome
 from utils.logger import setup_logger
+from utils.ssm import get_parameter
 import pytz
 
 logger = setup_logger(__name__)
 
+# build() parses the (large) discovery document, so keep one service per
+# user and refresh token for the life of the container
+_SERVICE_CACHE: Dict[Tuple[str, str], Any] = {}
+
 
 class GoogleFitStepsIntegration(BaseIntegration):
     """Google Fit steps metric integration."""
@@ -16,7 +21,6 @@ class GoogleFitStepsIntegration(BaseIntegration):
     def __init__(self, user_id: str, user_timezone: str = 'America/Edmonton'):
         super().__init__(user_id)
         self.user_timezone = pytz.timezone(user_timezone)
-        self.ssm = boto3.client('ssm')
         self.credentials = self._get_credentials()
 
     def _get_credentials(self) -> Credentials:
@@ -24,14 +28,12 @@ class GoogleFitStepsIntegration(BaseIntegration):
         try:
             # Get OAuth token for this user
             token_param = f"/life-stats/google-fit/{self.user_id}/token"
-            response = self.ssm.get_parameter(Name=token_param, WithDecryption=True)
-            token_data = response['Parameter']['Value']
+            token_data = get_parameter(token_param, decrypt=True)
 
             # Parse JSON credentials
-            import json
-            creds = json.loads(token_data)
+            creds = orjson.loads(token_data)
 
-            logger.info(f"Retrieved credentials for user {self.user_id}")
+            logger.info("Retrieved credentials for user %s", self.user_id)
 
             return Credentials(
                 token=creds.get('token'),
@@ -42,62 +44,119 @@ class GoogleFitStepsIntegration(BaseIntegration):
                 scopes=creds.get('scopes')
             )
         except Exception as e:
-            logger.error(f"Failed to retrieve credentials: {e}")
+            logger.error("Failed to retrieve credentials: %s", e)
             raise
 
-    def fetch_data(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Fetch steps data from Google Fit API."""
+    def _get_service(self):
+        """Return the Fitness API service for this user, building it on first use."""
+        key = (self.user_id, self.credentials.refresh_token)
+        if key not in _SERVICE_CACHE:
+            # Use the discovery document bundled with google-api-python-client rather than
+            # fetching it, and skip the file cache that warns (and is useless) on Lambda
+            _SERVICE_CACHE[key] = build('fitness', 'v1', credentials=self.credentials,
+                                        static_discovery=True, cache_discovery=False)
+        return _SERVICE_CACHE[key]
+
+    def _aggregate_request(self, since: DateInput = None, until: DateInput = None):
+        """Build the daily step count aggregate request for the fetch window."""
         start_date, end_date = self._get_date_range(since, until)
 
         # Convert to user's timezone for proper day boundaries
         start_local = start_date.astimezone(self.user_timezone).replace(hour=0, minute=0, second=0, microsecond=0)
         end_local = end_date.astimezone(self.user_timezone).replace(hour=23, minute=59, second=59, microsecond=999999)
 
-        logger.info(f"Fetching Google Fit steps for {self.user_id} from {start_local} to {end_local} ({self.user_timezone})")
+        logger.info("Fetching Google Fit steps for %s from %s to %s (%s)",
+                    self.user_id, start_local, end_local, self.user_timezone)
+
+        # Convert to milliseconds for Google Fit API
+        start_time_millis = int(start_local.timestamp() * 1000)
+        end_time_millis = int(end_local.timestamp() * 1000)
+
+        # Request daily step counts
+        body = {
+            "aggregateBy": [{
+                "dataTypeName": "com.google.step_count.delta",
+                "dataSourceId": "derived:com.google.step_count.delta:com.google.android.gms:estimated_steps"
+            }],
+            "bucketByTime": {"durationMillis": 86400000},  # 1 day
+            "startTimeMillis": start_time_millis,
+            "endTimeMillis": end_time_millis
+        }
+
+        return self._get_service().users().dataset().aggregate(userId='me', body=body)
+
+    def _parse_response(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert an aggregate response into daily step data points."""
+        now_iso = datetime.now(timezone.utc).isoformat()
+        data_points = []
+        for bucket in response.get('bucket', []):
+            # Buckets start at the user's local midnight, so one date covers every point in them
+            bucket_start = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000, tz=self.user_timezone)
+            date_str = bucket_start.strftime('%Y-%m-%d')
+            data_points.extend(
+                {'date': date_str, 'value': sum(v.get('intVal', 0) for v in point['value']), 'timestamp': now_iso}
+                for dataset in bucket.get('dataset', [])
+                for point in dataset.get('point', [])
+                if point.get('value')
+            )
 
-        try:
-            service = build('fitness', 'v1', credentials=self.credentials)
-
-            # Convert to milliseconds for Google Fit API
-            start_time_millis = int(start_local.timestamp() * 1000)
-            end_time_millis = int(end_local.timestamp() * 1000)
-
-            # Request daily step counts
-            body = {
-                "aggregateBy": [{
-                    "dataTypeName": "com.google.step_count.delta",
-                    "dataSourceId": "derived:com.google.step_count.delta:com.google.android.gms:estimated_steps"
-                }],
-                "bucketByTime": {"durationMillis": 86400000},  # 1 day
-                "startTimeMillis": start_time_millis,
-                "endTimeMillis": end_time_millis
-            }
-
-            response = service.users().dataset().aggregate(userId='me', body=body).execute()
-
-            data_points = []
-            for bucket in response.get('bucket', []):
-                for dataset in bucket.get('dataset', []):
-                    for point in dataset.get('point', []):
-                        if point.get('value'):
-                            steps = sum(v.get('intVal', 0) for v in point['value'])
-                            # Convert timestamp to user's timezone for date
-                            point_time = datetime.fromtimestamp(
-                                int(point['startTimeNanos']) / 1e9,
-                                tz=self.user_timezone
-                            )
-                            date_str = point_time.strftime('%Y-%m-%d')
-
-                            data_points.append({
-                                'date': date_str,
-                                'value': steps,
-                                'timestamp': datetime.now(timezone.utc).isoformat()
-                            })
-                            logger.debug(f"Fetched steps for {date_str}: {steps}")
-
-            logger.info(f"Successfully fetched {len(data_points)} data points")
-            return data_points
+        logger.info("Successfully fetched %s data points", len(data_points))
+        return data_points
+
+    def _safe_parse(self, response: Dict[str, Any], exception: Optional[Exception]) -> FetchOutcome:
+        """
+        Turn one batch response into this user's outcome: its data points, or the error.
 
+        A failed request or malformed response must fail only its own user, not escape batch.execute().
+        """
+        if exception is None:
+            try:
+                return self._parse_response(response)
+            except Exception as e:
+                exception = e
+        logger.error("Error fetching Google Fit data for %s: %s", self.user_id, exception)
+        return exception
+
+    def fetch_data(self, since: DateInput = None, until: DateInput = None) -> List[Dict[str, Any]]:
+        """Fetch steps data from Google Fit API."""
+        try:
+            response = self._aggregate_request(since, until).execute()
+            return self._parse_response(response)
         except Exception as e:
-            logger.error(f"Error fetching Google Fit data: {e}", exc_info=True)
+            logger.error("Error fetching Google Fit data: %s", e)
             raise
+
+    @classmethod
+    def fetch_many(cls, jobs: List[Tuple[BaseIntegration, DateInput]], until: DateInput = None) -> List[FetchOutcome]:
+        """
+        Fetch steps for several users in one batch HTTP request.
+
+        Each aggregate call keeps its own user's credentials inside the batch, so the
+        fan-out costs a single round trip to Google instead of one per user. Per-user
+        API errors and malformed responses become outcomes; a failure of the batch
+        request itself is raised.
+        """
+        if len(jobs) < 2:
+            return super().fetch_many(jobs, until)
+
+        outcomes: List[FetchOutcome] = [None] * len(jobs)
+
+        def callback(request_id: str, response: Dict[str, Any], exception: Optional[Exception]) -> None:
+            index = int(request_id)
+            outcomes[index] = jobs[index][0]._safe_parse(response, exception)
+
+        batch = None
+        for index, (integration, since) in enumerate(jobs):
+            try:
+                request = integration._aggregate_request(since, until)
+            except Exception as e:
+                outcomes[index] = e
+                continue
+            if batch is None:
+                batch = integration._get_service().new_batch_http_request(callback=callback)
+            batch.add(request, request_id=str(index))
+
+        if batch is not None:
+            batch.execute()
+
+        return outcomes
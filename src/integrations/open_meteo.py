@@ -1,14 +1,69 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 from decimal import Decimal
+from functools import lru_cache
+import glob
+import hashlib
+import json
+import os
+import tempfile
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from integrations.base import BaseIntegration
+from integrations.base import BaseIntegration, DateInput
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# One retrying session per container so warm invocations reuse pooled connections
+_SESSION = None
+
+
+def _get_session() -> requests.Session:
+    """Return the shared Open-Meteo session, configuring it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+        # One host, but several users may fetch concurrently; keep a warm connection for each
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=1,
+                              pool_maxsize=BaseIntegration.FETCH_WORKERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSION = session
+    return _SESSION
+
+
+# Daily columns requested from the archive, in the order fetch_data unpacks them
+_DAILY_FIELDS = (
+    'temperature_2m_max',
+    'temperature_2m_min',
+    'relative_humidity_2m_mean',
+    'surface_pressure_mean',
+    'precipitation_sum',
+    'wind_speed_10m_max',
+    'sunshine_duration',
+)
+
+
+# Cached responses kept in /tmp; writing a new one prunes all but the most recent
+_CACHE_MAX_ENTRIES = 32
+
+
+@lru_cache(maxsize=4096)
+def _to_decimal(value) -> Decimal:
+    """Convert a JSON number to Decimal for DynamoDB, handle None. Daily values repeat often, so cache them."""
+    if value is None:
+        return Decimal('0')
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
 
 class OpenMeteoWeatherIntegration(BaseIntegration):
     """Open-Meteo weather data integration for Eau Claire, Calgary."""
@@ -19,25 +74,79 @@ class OpenMeteoWeatherIntegration(BaseIntegration):
 
     def __init__(self, user_id: str):
         super().__init__(user_id)
-        # Configure session with retry logic
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
+        self.session = _get_session()
+
+    def _cache_path(self, params: Dict[str, Any]) -> str:
+        """Location in /tmp (kept across warm invocations) of the cached response for a request."""
+        # Every parameter shapes the response, so all of them key the entry, not just the dates
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        name = f"openmeteo_{params['start_date']}_{params['end_date']}_{digest}.json"
+        return os.path.join(tempfile.gettempdir(), name)
 
-    def _to_decimal(self, value):
-        """Convert float/int to Decimal for DynamoDB, handle None."""
-        if value is None:
-            return Decimal('0')
-        return Decimal(str(value))
+    def _read_cache(self, path: str) -> Optional[Tuple[str, str]]:
+        """Return the cached (ETag, body) for a request, if any."""
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            return cached['etag'], cached['body']
+        except (OSError, ValueError, KeyError):
+            return None
 
-    def fetch_data(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _write_cache(self, path: str, etag: str, body: str) -> None:
+        """Save a response body and its ETag, replacing any previous entry atomically."""
+        cache_dir = os.path.dirname(path)
+        try:
+            # Concurrent workers often cache the same request, so each writes its own temp file
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='openmeteo_', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'etag': etag, 'body': body}, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Could not cache Open-Meteo response: %s", e)
+            return
+        self._prune_cache(cache_dir)
+
+    def _prune_cache(self, cache_dir: str) -> None:
+        """Delete all but the _CACHE_MAX_ENTRIES most recently written cached responses."""
+        entries = []
+        for entry in glob.glob(os.path.join(cache_dir, 'openmeteo_*.json')):
+            try:
+                entries.append((os.path.getmtime(entry), entry))
+            except OSError:
+                continue  # Already pruned by a concurrent worker
+        for _, entry in sorted(entries, reverse=True)[_CACHE_MAX_ENTRIES:]:
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+
+    def _get_archive(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        GET the archive endpoint, revalidating a cached copy of the same range with If-None-Match.
+
+        Floats are decoded straight to Decimal (what DynamoDB needs) instead of float -> str -> Decimal.
+        """
+        cache_path = self._cache_path(params)
+        cached = self._read_cache(cache_path)
+        headers = {'If-None-Match': cached[0]} if cached else None
+
+        response = self.session.get(url, params=params, timeout=30, headers=headers)
+        if cached and response.status_code == 304:
+            logger.info("Open-Meteo data unchanged for %s to %s, using cached response",
+                        params['start_date'], params['end_date'])
+            return json.loads(cached[1], parse_float=Decimal)
+
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        if etag:
+            self._write_cache(cache_path, etag, response.text)
+        return response.json(parse_float=Decimal)
+
+    def fetch_data(self, since: DateInput = None, until: DateInput = None) -> List[Dict[str, Any]]:
         """Fetch daily weather data from Open-Meteo API."""
         start_date, end_date = self._get_date_range(since, until)
 
@@ -45,7 +154,7 @@ class OpenMeteoWeatherIntegration(BaseIntegration):
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
 
-        logger.info(f"Fetching weather data for {self.user_id} from {start_str} to {end_str}")
+        logger.info("Fetching weather data for %s from %s to %s", self.user_id, start_str, end_str)
 
         try:
             url = "https://archive-api.open-meteo.com/v1/archive"
@@ -54,45 +163,39 @@ class OpenMeteoWeatherIntegration(BaseIntegration):
                 'longitude': self.LONGITUDE,
                 'start_date': start_str,
                 'end_date': end_str,
-                'daily': [
-                    'temperature_2m_max',
-                    'temperature_2m_min',
-                    'relative_humidity_2m_mean',
-                    'surface_pressure_mean',
-                    'precipitation_sum',
-                    'wind_speed_10m_max',
-                    'sunshine_duration'
-                ],
+                'daily': list(_DAILY_FIELDS),
                 'timezone': 'America/Edmonton'
             }
 
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_archive(url, params)
 
             data_points = []
             daily = data.get('daily', {})
             times = daily.get('time', [])
 
-            for i, date_str in enumerate(times):
+            now_iso = datetime.now(timezone.utc).isoformat()
+            # A missing or short column is a malformed response: fail loudly rather than drop days
+            columns = zip(times, *(daily[field] for field in _DAILY_FIELDS), strict=True) if times else ()
+
+            for date_str, temp_max, temp_min, humidity, pressure, precipitation, wind, sunshine in columns:
                 data_points.append({
                     'date': date_str,
                     'value': {
-                        'temp_max': self._to_decimal(daily['temperature_2m_max'][i]),
-                        'temp_min': self._to_decimal(daily['temperature_2m_min'][i]),
-                        'humidity_mean': self._to_decimal(daily['relative_humidity_2m_mean'][i]),
-                        'pressure_mean': self._to_decimal(daily['surface_pressure_mean'][i]),
-                        'precipitation': self._to_decimal(daily['precipitation_sum'][i]),
-                        'wind_max': self._to_decimal(daily['wind_speed_10m_max'][i]),
-                        'sunshine_duration': self._to_decimal(daily['sunshine_duration'][i])
+                        'temp_max': _to_decimal(temp_max),
+                        'temp_min': _to_decimal(temp_min),
+                        'humidity_mean': _to_decimal(humidity),
+                        'pressure_mean': _to_decimal(pressure),
+                        'precipitation': _to_decimal(precipitation),
+                        'wind_max': _to_decimal(wind),
+                        'sunshine_duration': _to_decimal(sunshine)
                     },
-                    'timestamp': datetime.now(timezone.utc).isoformat()
+                    'timestamp': now_iso
                 })
-                logger.debug(f"Fetched weather for {date_str}")
+                logger.debug("Fetched weather for %s", date_str)
 
-            logger.info(f"Successfully fetched {len(data_points)} weather data points")
+            logger.info("Successfully fetched %s weather data points", len(data_points))
             return data_points
 
         except Exception as e:
-            logger.error(f"Error fetching Open-Meteo data: {e}", exc_info=True)
+            logger.error("Error fetching Open-Meteo data: %s", e)
             raise
@@ -23,7 +23,9 @@ class IntegrationRegistry:
         if not integration_class:
             raise ValueError(f"Unknown metric: {metric_name}")
 
-        logger.debug(f"Creating integration for metric '{metric_name}'")
+        logger.debug("Creating integration for metric '%s'", metric_name)
+        # A fresh instance per call, so credentials are re-read through the SSM TTL cache; what
+        # is worth keeping across warm invocations lives in the integrations' module-level caches
         return integration_class(user_id)
 
     def list_metrics(self) -> List[str]:
@@ -34,4 +36,4 @@ class IntegrationRegistry:
     def register(cls, metric_name: str, integration_class: Type[BaseIntegration]) -> None:
         """Register a new integration."""
         cls._integrations[metric_name] = integration_class
-        logger.info(f"Registered integration for metric '{metric_name}'")
+        logger.info("Registered integration for metric '%s'", metric_name)
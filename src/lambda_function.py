@@ -1,73 +1,127 @@
-import json
-from typing import Dict, Any, List
+import logging
+import orjson
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from integrations.base import BaseIntegration, FetchOutcome, parse_since, parse_until
 from integrations.registry import IntegrationRegistry
 from utils.db import MetricsDB
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Bounded to stay well inside SSM and DynamoDB request-rate quotas
+MAX_WORKERS = 16
 
-def _store_dynamic_metrics(uid: str, metric: str, data_points: List[Dict], db: MetricsDB, start_date: str) -> Dict[str, Any]:
-    """Store metrics with dynamic types (e.g., ClickUp tasks)."""
-    grouped = {}
-    for point in data_points:
-        mt = point.get('metric_type', metric)
-        if mt not in grouped:
-            grouped[mt] = []
-        grouped[mt].append(point)
 
-    total_stored = 0
-    for metric_type, points in grouped.items():
-        for point in points:
-            logger.info(f"{uid}/{metric_type} - {point['date']}: {point['value']}")
+def _log_points(uid: str, items: List[Tuple[str, Dict]]) -> None:
+    """Log each point's value at DEBUG; store_metrics_multi logs the batch summary."""
+    if logger.isEnabledFor(logging.DEBUG):
+        for metric_type, point in items:
+            logger.debug("%s/%s - %s: %s", uid, metric_type, point['date'], point['value'])
 
-        db.store_metrics(uid, metric_type, points)
-        total_stored += len(points)
-        logger.info(f"Successfully stored {len(points)} points for {uid}/{metric_type}")
+
+def _store_metrics(uid: str, metric: str, data_points: List[Dict], db: MetricsDB,
+                   start_date: Optional[datetime]) -> Dict[str, Any]:
+    """Store metrics in one batch, typed by each point's metric_type (ClickUp tasks) or the metric itself."""
+    items = [(point.get('metric_type', metric), point) for point in data_points]
+    _log_points(uid, items)
+    db.store_metrics_multi(uid, items)
 
     if not start_date:
         db.update_last_run(uid, metric)
 
-    return {'user_id': uid, 'metric': metric, 'count': total_stored, 'status': 'success'}
+    return {'user_id': uid, 'metric': metric, 'count': len(data_points), 'status': 'success'}
 
 
-def _store_single_metric(uid: str, metric: str, data_points: List[Dict], db: MetricsDB, start_date: str) -> Dict[str, Any]:
-    """Store metrics with single type."""
-    for point in data_points:
-        logger.info(f"{uid}/{metric} - {point['date']}: {point['value']}")
+def _prepare_pair(metric: str, uid: str, registry: IntegrationRegistry, last_runs: Dict[Tuple[str, str], str],
+                  start_date: Optional[datetime]) -> Tuple[BaseIntegration, Optional[datetime]]:
+    """Create the integration for one metric/user and resolve where its fetch starts."""
+    logger.info("Processing metric '%s' for user '%s'", metric, uid)
+    integration = registry.get_integration(metric, uid)
 
-    db.store_metrics(uid, metric, data_points)
+    # Use the prefetched last run time or the provided start_date
+    last_run = last_runs.get((uid, metric)) if not start_date else None
+    logger.info("Using %s: %s", 'provided start_date' if start_date else 'last run', start_date or last_run)
+    return integration, start_date or parse_since(last_run)
 
-    if not start_date:
-        db.update_last_run(uid, metric)
 
-    logger.info(f"Successfully stored {len(data_points)} points for {uid}/{metric}")
-    return {'user_id': uid, 'metric': metric, 'count': len(data_points), 'status': 'success'}
+def _store_pair(uid: str, metric: str, data_points: List[Dict], db: MetricsDB,
+                start_date: Optional[datetime]) -> Dict[str, Any]:
+    """Store the data fetched for one metric/user."""
+    logger.info("Fetched %s data points for %s/%s", len(data_points), uid, metric)
 
+    if not data_points:
+        logger.info("No new data for %s/%s", uid, metric)
+        return {'user_id': uid, 'metric': metric, 'count': 0, 'status': 'no_data'}
 
-def _process_metric(uid: str, metric: str, integration, db: MetricsDB, start_date: str, end_date: str) -> Dict[str, Any]:
-    """Process a single metric for a user."""
-    logger.info(f"Processing metric '{metric}' for user '{uid}'")
+    return _store_metrics(uid, metric, data_points, db, start_date)
 
-    # Get last run time or use provided start_date
-    last_run = start_date if start_date else db.get_last_run(uid, metric)
-    logger.info(f"Using {'provided start_date' if start_date else 'last run'}: {last_run}")
 
-    # Fetch data
-    data_points = integration.fetch_data(last_run, end_date)
-    logger.info(f"Fetched {len(data_points)} data points")
+def _capture(func: Callable, *args) -> Any:
+    """Call func, returning the exception instead of raising it."""
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
 
-    if not data_points:
-        logger.info(f"No new data for {uid}/{metric}")
-        return {'user_id': uid, 'metric': metric, 'count': 0, 'status': 'no_data'}
 
-    # Check if data points have dynamic metric_type
-    has_dynamic_types = any('metric_type' in point for point in data_points)
+def _fetch_metric(jobs: List[Tuple[BaseIntegration, Optional[datetime]]],
+                  until_dt: Optional[datetime]) -> List[FetchOutcome]:
+    """Fetch every user of one metric through its integration's fetch_many."""
+    try:
+        return type(jobs[0][0]).fetch_many(jobs, until_dt)
+    except Exception as e:
+        return [e] * len(jobs)
 
-    if has_dynamic_types:
-        return _store_dynamic_metrics(uid, metric, data_points, db, start_date)
-    else:
-        return _store_single_metric(uid, metric, data_points, db, start_date)
+
+def _run_pairs(pairs: List[Tuple[str, str]], registry: IntegrationRegistry, db: MetricsDB,
+               since_dt: Optional[datetime], until_dt: Optional[datetime]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Process metric/user pairs in three phases: prepare, fetch, store.
+
+    Preparing and storing are I/O bound per pair and run concurrently. Fetching is
+    grouped per metric so integrations can batch their users into fewer API calls.
+    Returns (results, errors) in pair order.
+    """
+    # One BatchGetItem for every pair's last run instead of a GetItem each
+    last_runs = {} if since_dt else db.get_last_runs([(uid, metric) for metric, uid in pairs])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(pairs)))) as executor:
+        outcomes = list(executor.map(
+            lambda pair: _capture(_prepare_pair, pair[0], pair[1], registry, last_runs, since_dt), pairs
+        ))
+
+        by_metric: Dict[str, List[int]] = defaultdict(list)
+        for index, (metric, _) in enumerate(pairs):
+            if not isinstance(outcomes[index], Exception):
+                by_metric[metric].append(index)
+        fetches = {
+            metric: executor.submit(_fetch_metric, [outcomes[i] for i in indices], until_dt)
+            for metric, indices in by_metric.items()
+        }
+        for metric, indices in by_metric.items():
+            for index, fetched in zip(indices, fetches[metric].result()):
+                outcomes[index] = fetched
+
+        def store(index: int) -> Any:
+            (metric, uid), fetched = pairs[index], outcomes[index]
+            if isinstance(fetched, Exception):
+                return fetched
+            return _capture(_store_pair, uid, metric, fetched, db, since_dt)
+
+        outcomes = list(executor.map(store, range(len(pairs))))
+
+    results = []
+    errors = []
+    for (metric, uid), outcome in zip(pairs, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("Error processing %s for %s: %s", metric, uid, outcome)
+            errors.append({'user_id': uid, 'metric': metric, 'error': str(outcome)})
+        else:
+            results.append(outcome)
+    return results, errors
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -87,58 +141,58 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     end_date = event.get('end_date')
     source = event.get('source', 'eventbridge')
 
+    # Resolve the window once so integrations never re-parse it
+    try:
+        since_dt = parse_since(start_date)
+        until_dt = parse_until(end_date)
+    except (TypeError, ValueError) as e:
+        logger.error("Invalid date range in event: %s", e)
+        return {
+            'statusCode': 400,
+            'body': orjson.dumps({'error': f"Invalid date range: {str(e)}"}).decode()
+        }
+
     # Determine run type
     run_type = "MANUAL" if source == 'manual' else "AUTOMATIC"
 
     # Log run parameters
-    logger.info(f"=== Lambda Invocation ({run_type}) ===")
-    logger.info(f"User ID: {user_id or 'all users'}")
-    logger.info(f"Metric: {metric_name or 'all metrics'}")
-    logger.info(f"Start Date: {start_date or 'from last run'}")
-    logger.info(f"End Date: {end_date or 'now'}")
+    logger.info("=== Lambda Invocation (%s) ===", run_type)
+    logger.info("User ID: %s", user_id or 'all users')
+    logger.info("Metric: %s", metric_name or 'all metrics')
+    logger.info("Start Date: %s", start_date or 'from last run')
+    logger.info("End Date: %s", end_date or 'now')
     logger.info("=" * 50)
 
     db = MetricsDB()
     registry = IntegrationRegistry()
 
-    results = []
-    errors = []
-
     try:
         # Determine which metrics to run
         metrics_to_run = [metric_name] if metric_name else registry.list_metrics()
-        logger.info(f"Running metrics: {metrics_to_run}")
+        logger.info("Running metrics: %s", metrics_to_run)
 
         # Determine which users to process
         users = [user_id] if user_id else db.get_all_users()
-        logger.info(f"Processing {len(users)} user(s)")
+        logger.info("Processing %s user(s)", len(users))
 
         # Process each metric for each user
-        for metric in metrics_to_run:
-            for uid in users:
-                try:
-                    integration = registry.get_integration(metric, uid)
-                    result = _process_metric(uid, metric, integration, db, start_date, end_date)
-                    results.append(result)
-                except Exception as e:
-                    error_msg = f"Error processing {metric} for {uid}: {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    errors.append({'user_id': uid, 'metric': metric, 'error': str(e)})
-
-        logger.info(f"Lambda execution completed: {len(results)} successful, {len(errors)} errors")
+        pairs = [(metric, uid) for metric in metrics_to_run for uid in users]
+        results, errors = _run_pairs(pairs, registry, db, since_dt, until_dt)
+
+        logger.info("Lambda execution completed: %s successful, %s errors", len(results), len(errors))
         return {
             'statusCode': 200 if not errors else 207,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'results': results,
                 'errors': errors,
                 'total_processed': len(results),
                 'total_errors': len(errors)
-            })
+            }).decode()
         }
 
     except Exception as e:
-        logger.error(f"Fatal error in Lambda handler: {str(e)}", exc_info=True)
+        logger.error("Fatal error in Lambda handler: %s", e, exc_info=True)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+            'body': orjson.dumps({'error': str(e)}).decode()
         }
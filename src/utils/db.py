@@ -1,72 +1,241 @@
 import os
+import time
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# One low-level client per container: unlike boto3 resources, clients are thread-safe,
+# so the handler's worker threads share it and warm invocations reuse its connection
+# pool (and TLS sessions to DynamoDB)
+_DYNAMODB_CLIENT = None
+
+# Keepalive holds pooled connections open between warm invocations; the pool is
+# sized above the handler's worker count so concurrent stores never queue on it
+_DYNAMODB_CONFIG = Config(
+    retries={'max_attempts': 4, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    max_pool_connections=32
+)
+
+# The client speaks DynamoDB's typed attribute format; these convert plain Python values
+_SERIALIZER = TypeSerializer()
+_DESERIALIZER = TypeDeserializer()
+
+# Runs table item whose 'users' string set lists every user, so listing them is a GetItem, not a Scan
+USERS_REGISTRY_KEY = {'user_id': '__users__', 'metric_type': '__all__'}
+
+BATCH_GET_SIZE = 100  # BatchGetItem key limit per request
+BATCH_WRITE_SIZE = 25  # BatchWriteItem request limit
+UNPROCESSED_BACKOFF = 0.1  # seconds before the first re-drive of throttled items, doubled each retry
+UNPROCESSED_MAX_RETRIES = 6
+
+
+def get_dynamodb_client():
+    """Return the module-level DynamoDB client, creating it on first use."""
+    global _DYNAMODB_CLIENT
+    if _DYNAMODB_CLIENT is None:
+        _DYNAMODB_CLIENT = boto3.client('dynamodb', config=_DYNAMODB_CONFIG)
+    return _DYNAMODB_CLIENT
+
+
+def _serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain item to DynamoDB attribute values."""
+    return {key: _SERIALIZER.serialize(value) for key, value in item.items()}
+
+
+def _deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert DynamoDB attribute values back to a plain item."""
+    return {key: _DESERIALIZER.deserialize(value) for key, value in item.items()}
+
 
 class MetricsDB:
     """DynamoDB interface for metrics storage."""
 
     def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.metrics_table = self.dynamodb.Table(os.environ.get('METRICS_TABLE', 'life-stats-metrics'))
-        self.runs_table = self.dynamodb.Table(os.environ.get('RUNS_TABLE', 'life-stats-runs'))
+        self.client = get_dynamodb_client()
+        self.metrics_table = os.environ.get('METRICS_TABLE', 'life-stats-metrics')
+        self.runs_table = os.environ.get('RUNS_TABLE', 'life-stats-runs')
 
     def store_metrics(self, user_id: str, metric_type: str, data_points: List[Dict[str, Any]]) -> None:
         """Store metric data points in DynamoDB."""
-        with self.metrics_table.batch_writer() as batch:
-            for point in data_points:
-                item = {
-                    'user_id': user_id,
-                    'metric_date': f"{point['date']}#{metric_type}",
-                    'metric_type': metric_type,
-                    'date': point['date'],
-                    'value': point['value'],
-                    'timestamp': point.get('timestamp', datetime.now(timezone.utc).isoformat())
-                }
-                batch.put_item(Item=item)
-                logger.debug(f"Stored metric: {item}")
+        self.store_metrics_multi(user_id, [(metric_type, point) for point in data_points])
+
+    def store_metrics_multi(self, user_id: str, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Store (metric_type, data point) pairs of any mix of metric types in DynamoDB.
+
+        All pairs are chunked into shared 25-item BatchWriteItem requests, so puts for
+        different metric types travel together instead of each type flushing its own.
+        """
+        # Points without their own timestamp share one for the whole batch
+        default_ts = datetime.now(timezone.utc).isoformat()
+        # A repeated key would fail the whole BatchWriteItem, so the last point for it wins
+        puts = {}
+        for metric_type, point in items:
+            metric_date = f"{point['date']}#{metric_type}"
+            puts[metric_date] = {'PutRequest': {'Item': _serialize({
+                'user_id': user_id,
+                'metric_date': metric_date,
+                'metric_type': metric_type,
+                'date': point['date'],
+                'value': point['value'],
+                'timestamp': point.get('timestamp', default_ts)
+            })}}
+
+        writes = list(puts.values())
+        retries = 0
+        for i in range(0, len(writes), BATCH_WRITE_SIZE):
+            retries += self._write_batch(writes[i:i + BATCH_WRITE_SIZE])
+        logger.info("Stored %s items for %s (%s), %s unprocessed retries", len(writes), user_id,
+                    ', '.join(sorted({metric_type for metric_type, _ in items})), retries)
+
+    def _write_batch(self, writes: List[Dict[str, Any]]) -> int:
+        """
+        Send one BatchWriteItem, re-driving UnprocessedItems with exponential backoff.
+
+        Returns the number of retries needed; raises if items are still unprocessed
+        after UNPROCESSED_MAX_RETRIES so nothing is silently dropped.
+        """
+        response = self.client.batch_write_item(RequestItems={self.metrics_table: writes})
+        retries = 0
+        while response.get('UnprocessedItems'):
+            if retries == UNPROCESSED_MAX_RETRIES:
+                remaining = len(response['UnprocessedItems'][self.metrics_table])
+                raise RuntimeError(f"{remaining} metric items still unprocessed after {retries} retries")
+            time.sleep(UNPROCESSED_BACKOFF * 2 ** retries)
+            retries += 1
+            response = self.client.batch_write_item(RequestItems=response['UnprocessedItems'])
+        return retries
 
     def get_last_run(self, user_id: str, metric_type: str) -> Optional[str]:
         """Get the last successful run timestamp for a user/metric."""
         try:
-            response = self.runs_table.get_item(
-                Key={
+            response = self.client.get_item(
+                TableName=self.runs_table,
+                Key=_serialize({
                     'user_id': user_id,
                     'metric_type': metric_type
-                }
+                })
             )
-            last_run = response.get('Item', {}).get('last_run_time')
-            logger.debug(f"Retrieved last run for {user_id}/{metric_type}: {last_run}")
+            last_run = _deserialize(response.get('Item', {})).get('last_run_time')
+            logger.debug("Retrieved last run for %s/%s: %s", user_id, metric_type, last_run)
             return last_run
         except Exception as e:
-            logger.warning(f"Could not retrieve last run: {e}")
+            logger.warning("Could not retrieve last run: %s", e)
             return None
 
+    def get_last_runs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """
+        Get last successful run timestamps for many (user_id, metric_type) pairs at once.
+
+        Uses BatchGetItem (100 keys per request) instead of one GetItem per pair. Pairs
+        that have never run are absent from the result.
+        """
+        last_runs = {}
+        keys = [_serialize({'user_id': user_id, 'metric_type': metric_type})
+                for user_id, metric_type in dict.fromkeys(pairs)]
+        try:
+            for i in range(0, len(keys), BATCH_GET_SIZE):
+                for item in self._get_batch(keys[i:i + BATCH_GET_SIZE]):
+                    last_runs[(item['user_id'], item['metric_type'])] = item.get('last_run_time')
+        except Exception as e:
+            logger.warning("Could not retrieve last runs: %s", e)
+        logger.debug("Retrieved %s last runs for %s pairs", len(last_runs), len(keys))
+        return last_runs
+
+    def _get_batch(self, keys: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send one BatchGetItem for runs table keys, re-driving UnprocessedKeys with exponential backoff.
+
+        Gives up after UNPROCESSED_MAX_RETRIES, logging how many keys were never read;
+        those pairs then fall back to their default start, as if they had never run.
+        """
+        request = {self.runs_table: {'Keys': keys, 'ProjectionExpression': 'user_id, metric_type, last_run_time'}}
+        items = []
+        retries = 0
+        while True:
+            response = self.client.batch_get_item(RequestItems=request)
+            items.extend(map(_deserialize, response.get('Responses', {}).get(self.runs_table, [])))
+            request = response.get('UnprocessedKeys')
+            if not request:
+                return items
+            if retries == UNPROCESSED_MAX_RETRIES:
+                logger.warning("%s last run keys still unprocessed after %s retries",
+                               len(request[self.runs_table]['Keys']), retries)
+                return items
+            time.sleep(UNPROCESSED_BACKOFF * 2 ** retries)
+            retries += 1
+
     def update_last_run(self, user_id: str, metric_type: str) -> None:
-        """Update the last run timestamp."""
+        """Update the last run timestamp and make sure the user is in the users registry."""
         now = datetime.now(timezone.utc).isoformat()
-        self.runs_table.put_item(
-            Item={
+        self.client.put_item(
+            TableName=self.runs_table,
+            Item=_serialize({
                 'user_id': user_id,
                 'metric_type': metric_type,
                 'last_run_time': now
-            }
+            })
+        )
+        self._register_users([user_id])
+        logger.debug("Updated last run for %s/%s: %s", user_id, metric_type, now)
+
+    def register_user(self, user_id: str) -> None:
+        """
+        Add a user to the users registry so scheduled runs pick them up.
+
+        Needed for users onboarded by hand: scheduled runs read only the registry, and
+        update_last_run only registers users who are already being processed.
+        """
+        self._register_users([user_id])
+        logger.info("Registered user %s", user_id)
+
+    def _register_users(self, users: List[str]) -> None:
+        """Add users to the string set held by the users registry item."""
+        self.client.update_item(
+            TableName=self.runs_table,
+            Key=_serialize(USERS_REGISTRY_KEY),
+            UpdateExpression='ADD #users :users',
+            ExpressionAttributeNames={'#users': 'users'},
+            ExpressionAttributeValues={':users': _SERIALIZER.serialize(set(users))}
         )
-        logger.debug(f"Updated last run for {user_id}/{metric_type}: {now}")
+
+    def _scan_users(self) -> List[str]:
+        """Collect distinct users from every page of the runs table."""
+        users = set()
+        kwargs = {'TableName': self.runs_table, 'ProjectionExpression': 'user_id'}
+        while True:
+            response = self.client.scan(**kwargs)
+            users.update(item['user_id']['S'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        users.discard(USERS_REGISTRY_KEY['user_id'])
+        return sorted(users)
 
     def get_all_users(self) -> List[str]:
-        """Get list of all users from runs table."""
+        """
+        Get list of all users from the users registry item in the runs table.
+
+        Falls back to scanning the runs table (and seeding the registry from the
+        result) when the registry item does not exist yet.
+        """
         try:
-            response = self.runs_table.scan(
-                ProjectionExpression='user_id'
-            )
-            users = list(set(item['user_id'] for item in response.get('Items', [])))
-            logger.debug(f"Found {len(users)} users")
+            response = self.client.get_item(TableName=self.runs_table, Key=_serialize(USERS_REGISTRY_KEY))
+            item = _deserialize(response.get('Item', {}))
+            if item and item.get('users'):
+                users = sorted(item['users'])
+            else:
+                users = self._scan_users()
+                if users:
+                    self._register_users(users)
+            logger.debug("Found %s users", len(users))
             return users if users else ['default']  # Return default user if none exist
         except Exception as e:
-            logger.warning(f"Could not retrieve users: {e}")
+            logger.warning("Could not retrieve users: %s", e)
             return ['default']
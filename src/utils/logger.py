@@ -1,8 +1,19 @@
 import logging
+import os
+
+# Never let a failing log handler print tracebacks to stderr from inside the handler
+logging.raiseExceptions = False
 
 
 def setup_logger(name: str) -> logging.Logger:
-    """Configure detailed CloudWatch logging."""
+    """Configure detailed CloudWatch logging, at the level given by LOG_LEVEL (default INFO)."""
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    level_name = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    level = logging.getLevelName(level_name)
+    # getLevelName returns a string for unknown names; a typo must not break cold starts
+    if not isinstance(level, int):
+        logger.setLevel(logging.INFO)
+        logger.warning("Unknown LOG_LEVEL %r, using INFO", level_name)
+        return logger
+    logger.setLevel(level)
     return logger
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from typing import List, Dict, Optional, Tuple
+import boto3
+import urllib3
+from botocore.config import Config
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# SSM values cached per (parameter name, decrypt) so warm Lambda containers skip the round trip
+_SSM_CACHE: Dict[Tuple[str, bool], Tuple[float, str]] = {}
+_CACHE_TTL = 300  # seconds
+SSM_BATCH_SIZE = 10
+
+# Shared across warm invocations; execution role credentials are refreshed by botocore
+_SSM_CLIENT = None
+
+# Fail fast when SSM is slow or throttling instead of stalling the whole run
+_SSM_CONFIG = Config(
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    connect_timeout=1.0,
+    read_timeout=2.0,
+    parameter_validation=False,
+    tcp_keepalive=True,
+    max_pool_connections=10
+)
+
+# Local HTTP client for the AWS Parameters and Secrets Lambda Extension
+_EXTENSION_HTTP = urllib3.PoolManager(timeout=urllib3.Timeout(connect=0.5, read=2.0))
+
+
+def get_ssm_client():
+    """Return the module-level SSM client, creating it on first use."""
+    global _SSM_CLIENT
+    if _SSM_CLIENT is None:
+        _SSM_CLIENT = boto3.client('ssm', config=_SSM_CONFIG)
+    return _SSM_CLIENT
+
+
+def _extension_port() -> Optional[str]:
+    """Port of the Parameters and Secrets extension, if running inside Lambda with the layer."""
+    if not os.environ.get('AWS_SESSION_TOKEN'):
+        return None
+    return os.environ.get('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT')
+
+
+def _fetch_from_extension(port: str, names: List[str], decrypt: bool) -> Dict[str, str]:
+    """Fetch parameters one at a time from the extension's in-memory cache."""
+    values = {}
+    missing = []
+    for name in names:
+        response = _EXTENSION_HTTP.request(
+            'GET',
+            f'http://localhost:{port}/systemsmanager/parameters/get',
+            fields={'name': name, 'withDecryption': 'true' if decrypt else 'false'},
+            headers={'X-Aws-Parameters-Secrets-Token': os.environ['AWS_SESSION_TOKEN']}
+        )
+        if response.status == 200:
+            values[name] = json.loads(response.data)['Parameter']['Value']
+        elif b'ParameterNotFound' in response.data:
+            missing.append(name)
+        else:
+            raise RuntimeError(f"Parameters extension returned {response.status} for {name}")
+
+    if missing:
+        raise ValueError(f"Parameters not found: {', '.join(missing)}")
+    return values
+
+
+def _fetch_from_ssm(names: List[str], decrypt: bool) -> Dict[str, str]:
+    """Fetch parameters from SSM directly, batching to the GetParameters limit."""
+    values = {}
+    for i in range(0, len(names), SSM_BATCH_SIZE):
+        response = get_ssm_client().get_parameters(Names=names[i:i + SSM_BATCH_SIZE], WithDecryption=decrypt)
+        invalid = response.get('InvalidParameters', [])
+        if invalid:
+            raise ValueError(f"Parameters not found: {', '.join(invalid)}")
+        for param in response['Parameters']:
+            values[param['Name']] = param['Value']
+    return values
+
+
+def get_parameters(names: List[str], decrypt: bool = True) -> Dict[str, str]:
+    """
+    Fetch SSM parameters by name, reusing values cached within the TTL.
+
+    Uncached values come from the Parameters and Secrets Lambda Extension when it is
+    available, otherwise from SSM in as few GetParameters calls as possible.
+    """
+    now = time.monotonic()
+    values = {}
+    missing = []
+    for name in names:
+        cached = _SSM_CACHE.get((name, decrypt))
+        if cached and now - cached[0] < _CACHE_TTL:
+            values[name] = cached[1]
+        else:
+            missing.append(name)
+
+    if missing:
+        port = _extension_port()
+        fetched = _fetch_from_extension(port, missing, decrypt) if port else _fetch_from_ssm(missing, decrypt)
+        for name, value in fetched.items():
+            _SSM_CACHE[(name, decrypt)] = (now, value)
+        values.update(fetched)
+
+    return values
+
+
+def get_parameter(name: str, decrypt: bool = True) -> str:
+    """Fetch a single SSM parameter value."""
+    return get_parameters([name], decrypt)[name]
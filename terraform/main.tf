@@ -103,6 +103,8 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Action = [
           "dynamodb:PutItem",
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:UpdateItem",
           "dynamodb:Query",
           "dynamodb:Scan",
           "dynamodb:BatchWriteItem"
@@ -173,12 +175,17 @@ resource "aws_lambda_function" "metrics_collector" {
   runtime         = "python3.11"
   timeout         = 300
   memory_size     = 256
+  layers          = [var.parameters_extension_layer_arn]
 
   environment {
     variables = {
       METRICS_TABLE = aws_dynamodb_table.metrics.name
       RUNS_TABLE    = aws_dynamodb_table.runs.name
       LOG_LEVEL     = "INFO"
+
+      # Parameters and Secrets extension: SSM values are served from its local cache
+      PARAMETERS_SECRETS_EXTENSION_HTTP_PORT = "2773"
+      SSM_PARAMETER_STORE_TTL                = tostring(var.ssm_cache_ttl_seconds)
     }
   }
 
@@ -27,3 +27,15 @@ variable "log_retention_days" {
   type        = number
   default     = 30
 }
+
+variable "parameters_extension_layer_arn" {
+  description = "ARN of the AWS Parameters and Secrets Lambda Extension layer for the region"
+  type        = string
+  default     = "arn:aws:lambda:us-west-2:345057560386:layer:AWS-Parameters-and-Secrets-Lambda-Extension:11"
+}
+
+variable "ssm_cache_ttl_seconds" {
+  description = "How long the Parameters and Secrets extension caches SSM values"
+  type        = number
+  default     = 300
+}
@@ -0,0 +1,501 @@
+"""
+Shared fixtures for the live test modules.
+Session-scoped so the whole run shares one boto3 session, one client per AWS service and one credential lookup.
+boto3 and requests are imported inside the fixtures, so they only load once a test actually needs AWS or ClickUp.
+"""
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+import pytest
+
+
+def pytest_addoption(parser):
+    """Add --live to run tests that call real external APIs (also enabled by SKIP_LIVE_API_TESTS=false)."""
+    parser.addoption(
+        '--live', action='store_true',
+        default=os.environ.get('SKIP_LIVE_API_TESTS', 'true').lower() == 'false',
+        help="run tests marked live against real external APIs"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip every live-marked test in one pass unless --live was given."""
+    if config.getoption('--live'):
+        return
+    skip_live = pytest.mark.skip(reason="Live API tests disabled (pass --live or set SKIP_LIVE_API_TESTS=false)")
+    for item in items:
+        if 'live' in item.keywords:
+            item.add_marker(skip_live)
+
+
+def _mock_aws_enabled(config):
+    """Whether this run serves AWS from moto: MOCK_AWS=true and no --live."""
+    return os.environ.get('MOCK_AWS', 'false').lower() == 'true' and not config.getoption('--live')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def mock_aws_services(request):
+    """
+    With MOCK_AWS=true (and without --live), serve every AWS call of the run from moto in-process.
+
+    The non-secret SSM parameters tests only check for existence are seeded with dummy values,
+    and a stand-in for the deployed stack is created so test_integration.py runs unchanged.
+    """
+    if not _mock_aws_enabled(request.config):
+        yield
+        return
+
+    from moto import mock_aws
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_DEFAULT_REGION', os.environ.get('AWS_REGION', 'us-west-2'))
+        with mock_aws():
+            import boto3
+            ssm = boto3.client('ssm')
+            for name in ('/life-stats/google-fit/client-id', '/life-stats/google-fit/client-secret'):
+                ssm.put_parameter(Name=name, Value='dummy', Type='SecureString')
+            _seed_deployed_stack()
+            yield
+
+
+def _seed_deployed_stack():
+    """
+    Create the resources test_integration.py expects of a deployed stack inside moto.
+
+    The function's code is a placeholder; lambda_client runs the real handler for its invocations.
+    """
+    import io
+    import zipfile
+    import boto3
+
+    function_name = os.environ.get('LAMBDA_FUNCTION_NAME', 'life-stats')
+    tables = {
+        os.environ.get('METRICS_TABLE', 'life-stats-metrics'): 'metric_date',
+        os.environ.get('RUNS_TABLE', 'life-stats-runs'): 'metric_type',
+    }
+
+    dynamodb = boto3.client('dynamodb')
+    for table_name, sort_key in tables.items():
+        dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': sort_key, 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': sort_key, 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+
+    role_arn = boto3.client('iam').create_role(
+        RoleName='life-stats-lambda-role',
+        AssumeRolePolicyDocument=json.dumps({'Version': '2012-10-17', 'Statement': [{
+            'Effect': 'Allow', 'Principal': {'Service': 'lambda.amazonaws.com'}, 'Action': 'sts:AssumeRole'
+        }]})
+    )['Role']['Arn']
+
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, 'w') as archive:
+        archive.writestr('lambda_function.py', 'def handler(event, context):\n    return {}\n')
+    boto3.client('lambda').create_function(
+        FunctionName=function_name,
+        Runtime='python3.11',
+        Role=role_arn,
+        Handler='lambda_function.handler',
+        Code={'ZipFile': package.getvalue()},
+        Timeout=300,
+        MemorySize=256,
+        Environment={'Variables': {'METRICS_TABLE': list(tables)[0], 'RUNS_TABLE': list(tables)[1]}}
+    )
+
+    boto3.client('events').put_rule(Name='life-stats-daily-trigger', ScheduleExpression='rate(24 hours)', State='ENABLED')
+    boto3.client('logs').create_log_group(logGroupName=f'/aws/lambda/{function_name}')
+
+
+def _invoke_handler_in_process(params, **kwargs):
+    """
+    botocore before-call hook answering Invoke with the real handler's output.
+
+    Returning a response here skips the request entirely, so this relies only on botocore's
+    public event system rather than on moto internals.
+    """
+    import io
+    from botocore.awsrequest import AWSResponse
+    from botocore.response import StreamingBody
+    from lambda_function import handler
+
+    # params is the serialized request: the event is the body, the invocation type a header
+    result = handler(json.loads(params['body'] or b'{}'), None)
+    if params['headers'].get('X-Amz-Invocation-Type') == 'Event':
+        status, body = 202, b''
+    else:
+        status, body = 200, json.dumps(result).encode()
+    return AWSResponse(None, status, {}, None), {'StatusCode': status, 'Payload': StreamingBody(io.BytesIO(body), len(body))}
+
+
+@pytest.fixture(scope='session')
+def now_utc():
+    """One 'now' for the whole run, so date windows computed by different tests and fixtures agree."""
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture(scope='session')
+def yesterday_utc(now_utc):
+    """Yesterday's UTC date as YYYY-MM-DD, the most recent complete day in the weather archive."""
+    return (now_utc - timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+@pytest.fixture(scope='session')
+def last_5_days(now_utc, yesterday_utc):
+    """(start, end) YYYY-MM-DD dates covering the five complete days up to yesterday."""
+    return (now_utc - timedelta(days=5)).strftime('%Y-%m-%d'), yesterday_utc
+
+
+@pytest.fixture(scope='session')
+def boto_session():
+    """One boto3 session for the run, so credentials and endpoints resolve once for every client below."""
+    import boto3
+    return boto3.session.Session()
+
+
+@pytest.fixture(scope='session')
+def boto_config():
+    """
+    Client config shared by the fixtures below.
+
+    The pool is sized past botocore's default of 10 so batch writers and parallel invocations
+    never queue on a free connection, and TCP keepalive stops idle pooled connections (e.g. between
+    slow Lambda invokes) being dropped, so later calls reuse them instead of redoing the TLS handshake.
+    """
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=50, connect_timeout=5, read_timeout=30, tcp_keepalive=True,
+        retries={'max_attempts': 3, 'mode': 'standard'}
+    )
+
+
+@pytest.fixture(scope='session')
+def ssm_client(boto_session, boto_config):
+    """SSM client for retrieving credentials."""
+    return boto_session.client('ssm', config=boto_config)
+
+
+@pytest.fixture(scope='session')
+def dynamodb_client(boto_session, boto_config):
+    """Low-level DynamoDB client for table setup and teardown."""
+    return boto_session.client('dynamodb', config=boto_config)
+
+
+@pytest.fixture(scope='session')
+def dynamodb_resource(boto_session, boto_config):
+    """DynamoDB resource for verifying data."""
+    return boto_session.resource('dynamodb', config=boto_config)
+
+
+@pytest.fixture(scope='session')
+def lambda_client(request, boto_session, boto_config):
+    """
+    Lambda client for invoking deployed function (read timeout raised to Lambda's 15 minute maximum).
+
+    Under MOCK_AWS its invocations run the handler in-process against the mocked tables.
+    """
+    from botocore.config import Config
+    client = boto_session.client('lambda', config=boto_config.merge(Config(read_timeout=900)))
+    if _mock_aws_enabled(request.config):
+        client.meta.events.register('before-call.lambda.Invoke', _invoke_handler_in_process)
+    return client
+
+
+@pytest.fixture(scope='session')
+def events_client(boto_session, boto_config):
+    """EventBridge client for checking the scheduled trigger."""
+    return boto_session.client('events', config=boto_config)
+
+
+@pytest.fixture(scope='session')
+def logs_client(boto_session, boto_config):
+    """CloudWatch Logs client for checking the function's log group."""
+    return boto_session.client('logs', config=boto_config)
+
+
+@pytest.fixture(scope='session')
+def lambda_function_name():
+    """Get Lambda function name from environment or default."""
+    return os.environ.get('LAMBDA_FUNCTION_NAME', 'life-stats')
+
+
+@pytest.fixture(scope='session')
+def lambda_fn_config(lambda_client, lambda_function_name):
+    """Deployed function's configuration, fetched once per run for every module that inspects it."""
+    return lambda_client.get_function(FunctionName=lambda_function_name)['Configuration']
+
+
+@pytest.fixture(scope='session')
+def metrics_table_name():
+    """Get metrics table name from environment or default."""
+    return os.environ.get('METRICS_TABLE', 'life-stats-metrics')
+
+
+@pytest.fixture(scope='session')
+def runs_table_name():
+    """Get runs table name from environment or default."""
+    return os.environ.get('RUNS_TABLE', 'life-stats-runs')
+
+
+@pytest.fixture(scope='session')
+def metrics_table(dynamodb_resource, metrics_table_name):
+    """Metrics table handle shared by every test that reads back stored data."""
+    return dynamodb_resource.Table(metrics_table_name)
+
+
+@pytest.fixture(scope='session')
+def runs_table(dynamodb_resource, runs_table_name):
+    """Runs table handle shared by every test that seeds or inspects last-run state."""
+    return dynamodb_resource.Table(runs_table_name)
+
+
+@pytest.fixture(scope='session')
+def invoke_lambda(lambda_client, lambda_function_name):
+    """
+    Start a RequestResponse invocation of the deployed function in the background.
+
+    Returns a future resolving to the decoded response payload, so a test can dispatch
+    several invocations (or keep working) instead of blocking on each cold start in turn.
+    """
+    executor = ThreadPoolExecutor(max_workers=8)
+
+    def invoke(payload):
+        response = lambda_client.invoke(
+            FunctionName=lambda_function_name,
+            InvocationType='RequestResponse',
+            Payload=json.dumps(payload)
+        )
+        return json.loads(response['Payload'].read())
+
+    yield lambda payload: executor.submit(invoke, payload)
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture(scope='session')
+def get_ssm(ssm_client):
+    """
+    Look up a decrypted SSM parameter, memoized for the run so each name is read at most once.
+
+    Returns None for a missing or unreadable parameter, and that answer is cached too.
+    """
+    from botocore.exceptions import ClientError
+
+    @functools.lru_cache(maxsize=None)
+    def get(name):
+        try:
+            return ssm_client.get_parameter(Name=name, WithDecryption=True)['Parameter']['Value']
+        except ClientError:
+            return None
+
+    return get
+
+
+@pytest.fixture(scope='session')
+def google_fit_client_creds(ssm_client):
+    """Google Fit OAuth client ID and secret, fetched once per session (None if missing)."""
+    from botocore.exceptions import ClientError
+
+    names = {'/life-stats/google-fit/client-id': 'client_id', '/life-stats/google-fit/client-secret': 'client_secret'}
+    try:
+        response = ssm_client.get_parameters(Names=list(names), WithDecryption=True)
+    except ClientError:
+        return None
+    if response['InvalidParameters']:
+        return None
+    return {names[param['Name']]: param['Value'] for param in response['Parameters']}
+
+
+@pytest.fixture(scope='session')
+def google_fit_credentials_exist(google_fit_client_creds):
+    """Check if Google Fit credentials are configured in SSM."""
+    return google_fit_client_creds is not None
+
+
+def _oauth_cache_path(user_id):
+    """Local file holding the last OAuth token generated for a test user."""
+    cache_home = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+    return cache_home / 'life-tracker' / f'oauth-{user_id}.json'
+
+
+def _cached_oauth_credentials(path):
+    """Load cached credentials, refreshing an expired access token; None if there is nothing usable."""
+    if not path.exists():
+        return None
+
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    credentials = Credentials.from_authorized_user_info(json.loads(path.read_text()))
+    if not credentials.valid and credentials.refresh_token:
+        credentials.refresh(Request())  # one token call instead of the interactive flow
+    return credentials if credentials.valid else None
+
+
+def _store_oauth_token(ssm_client, user_id, credentials, path):
+    """Store credentials in SSM (as the integration reads them) and in the local cache."""
+    token = json.dumps({
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'scopes': credentials.scopes
+    })
+    ssm_client.put_parameter(
+        Name=f'/life-stats/google-fit/{user_id}/token',
+        Value=token,
+        Type='SecureString',
+        Overwrite=True
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(token)
+    path.chmod(0o600)
+
+
+@pytest.fixture(scope='session')
+def test_user_with_oauth(request, ssm_client, get_ssm, google_fit_client_creds):
+    """Create test user with OAuth token if needed, reusing a locally cached token before asking the browser."""
+    if _mock_aws_enabled(request.config):
+        pytest.skip("Real Google Fit OAuth is not available under MOCK_AWS")
+
+    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
+
+    # Check if token exists
+    if get_ssm(f'/life-stats/google-fit/{test_user_id}/token') is not None:
+        return test_user_id
+
+    # Token doesn't exist - try to generate
+    if os.environ.get('AUTO_GENERATE_OAUTH', 'true').lower() != 'true':
+        pytest.fail(
+            f"OAuth token not found for {test_user_id}. "
+            "Set AUTO_GENERATE_OAUTH=true or run: "
+            "python scripts/generate-oauth-token.py")
+
+    cache_path = _oauth_cache_path(test_user_id)
+    credentials = _cached_oauth_credentials(cache_path)
+    if credentials is None:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        if google_fit_client_creds is None:
+            pytest.fail("Google Fit client ID/secret not found in SSM")
+
+        # Run OAuth flow
+        client_config = {
+            "installed": {
+                "client_id": google_fit_client_creds['client_id'],
+                "client_secret": google_fit_client_creds['client_secret'],
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "redirect_uris": ["http://localhost:8080/"]
+            }
+        }
+
+        scopes = [
+            'https://www.googleapis.com/auth/fitness.activity.read',
+            'https://www.googleapis.com/auth/fitness.body.read',
+        ]
+
+        flow = InstalledAppFlow.from_client_config(client_config, scopes)
+        credentials = flow.run_local_server(port=8080)
+
+    _store_oauth_token(ssm_client, test_user_id, credentials, cache_path)
+    return test_user_id
+
+
+@pytest.fixture(scope='session')
+def clickup_creds(ssm_client):
+    """ClickUp token, list ID and team ID for the test user, fetched once per session (None if missing)."""
+    from botocore.exceptions import ClientError
+
+    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
+    names = {f'/life-stats/clickup/{test_user_id}/{key}': key.replace('-', '_') for key in ('token', 'list-id', 'team-id')}
+    try:
+        response = ssm_client.get_parameters(Names=list(names), WithDecryption=True)
+    except ClientError:
+        return None
+    if response['InvalidParameters']:
+        return None
+    return {names[param['Name']]: param['Value'] for param in response['Parameters']}
+
+
+@pytest.fixture(scope='session')
+def clickup_credentials_exist(clickup_creds):
+    """Check if ClickUp credentials are configured in SSM."""
+    return clickup_creds is not None
+
+
+@pytest.fixture(scope='session')
+def clickup_http(clickup_creds):
+    """Keep-alive session for direct ClickUp API calls, authenticated as the test user."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    if clickup_creds is not None:
+        session.headers['Authorization'] = clickup_creds['token']
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope='session')
+def open_meteo_http():
+    """Keep-alive session for direct Open-Meteo API calls, so the external tests reuse one TLS connection."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope='session')
+def integration_registry():
+    """Integration registry shared by tests that only inspect which integrations are registered."""
+    from integrations.registry import IntegrationRegistry
+    return IntegrationRegistry()
+
+
+@pytest.fixture(scope='session')
+def clickup_integration(clickup_credentials_exist):
+    """ClickUp integration for the test user, shared so custom task types load once."""
+    if not clickup_credentials_exist:
+        pytest.skip("ClickUp credentials not configured")
+
+    from integrations.clickup import ClickUpTasksIntegration
+    return ClickUpTasksIntegration(os.environ.get('TEST_USER_ID', 'zerocool'))
+
+
+@pytest.fixture(scope='session')
+def clickup_recent_data(clickup_integration, now_utc):
+    """Data points for the last 7 days of ClickUp tasks, fetched once per session."""
+    since = (now_utc - timedelta(days=7)).strftime('%Y-%m-%d')
+    return clickup_integration.fetch_data(since=since)
+
+
+@pytest.fixture(scope='session')
+def weather_integration():
+    """Open-Meteo integration shared by the live weather tests."""
+    from integrations.open_meteo import OpenMeteoWeatherIntegration
+    return OpenMeteoWeatherIntegration('test-user')
+
+
+@pytest.fixture(scope='session')
+def yesterday_weather(weather_integration, yesterday_utc):
+    """Yesterday's Open-Meteo data points, fetched once per session (skips dependents if the API is down)."""
+    try:
+        return weather_integration.fetch_data(since=yesterday_utc, until=yesterday_utc)
+    except Exception as e:
+        pytest.skip(f"API unavailable: {e}")
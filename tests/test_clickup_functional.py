@@ -2,16 +2,9 @@
 Functional tests for ClickUp integration.
 Tests against real AWS resources (DynamoDB, SSM).
 """
-from botocore.exceptions import ClientError
-import boto3
 import os
-import sys
+import uuid
 import pytest
-from datetime import datetime, timezone, timedelta
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 # Set test environment
 os.environ['METRICS_TABLE'] = 'life-stats-metrics-test'
@@ -19,83 +12,70 @@ os.environ['RUNS_TABLE'] = 'life-stats-runs-test'
 os.environ['AWS_DEFAULT_REGION'] = os.environ.get('AWS_REGION', 'us-west-2')
 
 
-@pytest.fixture(scope='session')
-def ssm_client():
-    """SSM client for checking credentials."""
-    return boto3.client('ssm')
-
+@pytest.fixture
+def clickup_user_id(metrics_table):
+    """
+    A per-test user so parallel workers and repeated runs never collide.
 
-@pytest.fixture(scope='session')
-def dynamodb():
-    """DynamoDB resource for verifying data."""
-    return boto3.resource('dynamodb')
+    On teardown every metric stored for the user is deleted, so runs don't accumulate in the table.
+    """
+    from boto3.dynamodb.conditions import Key
 
+    test_user_id = f"{os.environ.get('TEST_USER_ID', 'zerocool')}-{uuid.uuid4().hex[:8]}"
+    yield test_user_id
 
-@pytest.fixture(scope='session')
-def clickup_credentials_exist(ssm_client):
-    """Check if ClickUp credentials are configured."""
-    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
-    try:
-        ssm_client.get_parameter(Name=f'/life-stats/clickup/{test_user_id}/token', WithDecryption=True)
-        ssm_client.get_parameter(Name=f'/life-stats/clickup/{test_user_id}/list-id', WithDecryption=False)
-        ssm_client.get_parameter(Name=f'/life-stats/clickup/{test_user_id}/team-id', WithDecryption=False)
-        return True
-    except ClientError:
-        return False
+    # Page through the user's partition reading only the keys needed to delete each item
+    query = {'KeyConditionExpression': Key('user_id').eq(test_user_id), 'ProjectionExpression': 'metric_date'}
+    with metrics_table.batch_writer() as batch:
+        while True:
+            response = metrics_table.query(**query)
+            for item in response['Items']:
+                batch.delete_item(Key={'user_id': test_user_id, 'metric_date': item['metric_date']})
+            if 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
 
-@pytest.mark.skipif(
-    os.environ.get('SKIP_LIVE_API_TESTS', 'true').lower() == 'true',
-    reason="Live API tests disabled"
-)
-def test_clickup_integration_stores_data(dynamodb, clickup_credentials_exist):
+@pytest.mark.live
+def test_clickup_integration_stores_data(metrics_table, clickup_recent_data, clickup_user_id):
     """Test that ClickUp integration stores data correctly in DynamoDB."""
-    if not clickup_credentials_exist:
-        pytest.skip("ClickUp credentials not configured")
-
-    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
+    test_user_id = clickup_user_id
 
-    from integrations.clickup import ClickUpTasksIntegration
+    from boto3.dynamodb.conditions import Key
     from utils.db import MetricsDB
 
-    # Fetch data
-    integration = ClickUpTasksIntegration(test_user_id)
-    since = (datetime.now(timezone.utc) - timedelta(days=3)).strftime('%Y-%m-%d')
-    data = integration.fetch_data(since=since)
+    data = clickup_recent_data
 
     if len(data) == 0:
         pytest.skip("No ClickUp data available for testing")
 
-    # Store in test database
-    db = MetricsDB()
-
     # Group by metric_type
     grouped = {}
     for point in data:
-        mt = point.get('metric_type', 'tasks')
-        if mt not in grouped:
-            grouped[mt] = []
-        grouped[mt].append(point)
+        grouped.setdefault(point.get('metric_type', 'tasks'), []).append(point)
+
+    # Store every metric type through one batch writer
+    MetricsDB().store_metrics_multi(test_user_id, [
+        (metric_type, point) for metric_type, points in grouped.items() for point in points
+    ])
+
+    # Verify data was stored: every point sorts at or after the earliest date, so one paginated Query reads them all
+    query = {
+        'KeyConditionExpression': Key('user_id').eq(test_user_id) & Key('metric_date').gte(min(p['date'] for p in data))
+    }
+    stored = {}
+    while True:
+        response = metrics_table.query(**query)
+        for item in response['Items']:
+            stored[(item['date'], item['metric_type'])] = item
+        if 'LastEvaluatedKey' not in response:
+            break
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-    # Store each metric type
     for metric_type, points in grouped.items():
-        db.store_metrics(test_user_id, metric_type, points)
-
-    # Verify data was stored
-    metrics_table = dynamodb.Table(os.environ['METRICS_TABLE'])
-
-    for metric_type in grouped.keys():
-        # Query for this specific metric type
-        for point in grouped[metric_type]:
-            response = metrics_table.get_item(
-                Key={
-                    'user_id': test_user_id,
-                    'metric_date': f"{point['date']}#{metric_type}"
-                }
-            )
-
-            assert 'Item' in response, f"No data stored for {metric_type} on {point['date']}"
-            item = response['Item']
+        for point in points:
+            item = stored.get((point['date'], metric_type))
+            assert item is not None, f"No data stored for {metric_type} on {point['date']}"
 
             # Verify structure
             assert 'value' in item
@@ -104,22 +84,10 @@ def test_clickup_integration_stores_data(dynamodb, clickup_credentials_exist):
             assert 'tags' in item['value']
 
 
-@pytest.mark.skipif(
-    os.environ.get('SKIP_LIVE_API_TESTS', 'true').lower() == 'true',
-    reason="Live API tests disabled"
-)
-def test_clickup_dynamic_metric_types(dynamodb, clickup_credentials_exist):
+@pytest.mark.live
+def test_clickup_dynamic_metric_types(clickup_recent_data):
     """Test that different task types create separate metrics."""
-    if not clickup_credentials_exist:
-        pytest.skip("ClickUp credentials not configured")
-
-    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
-
-    from integrations.clickup import ClickUpTasksIntegration
-
-    integration = ClickUpTasksIntegration(test_user_id)
-    since = (datetime.now(timezone.utc) - timedelta(days=3)).strftime('%Y-%m-%d')
-    data = integration.fetch_data(since=since)
+    data = clickup_recent_data
 
     if len(data) == 0:
         pytest.skip("No ClickUp data available for testing")
@@ -0,0 +1,308 @@
+"""Unit tests for ClickUp tasks integration (mocked)."""
+
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import Mock, patch
+from integrations import clickup
+from utils import ssm
+from integrations.clickup import ClickUpTasksIntegration
+
+
+def _ssm_response(user_id):
+    """Build a get_parameters response holding the three ClickUp parameters."""
+    prefix = f'/life-stats/clickup/{user_id}'
+    return {
+        'Parameters': [
+            {'Name': f'{prefix}/token', 'Value': 'pk_test'},
+            {'Name': f'{prefix}/list-id', 'Value': 'list-1'},
+            {'Name': f'{prefix}/team-id', 'Value': 'team-1'},
+        ],
+        'InvalidParameters': []
+    }
+
+
+def _ms(*args):
+    """Millisecond epoch timestamp (as ClickUp sends it) for a UTC datetime."""
+    return str(int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000))
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Reset module-level caches between tests."""
+    ssm._SSM_CACHE.clear()
+    clickup._CUSTOM_TYPES_CACHE.clear()
+    yield
+    ssm._SSM_CACHE.clear()
+    clickup._CUSTOM_TYPES_CACHE.clear()
+
+
+@pytest.fixture
+def mock_ssm():
+    """Patch the SSM client used by the integration."""
+    client = Mock()
+    client.get_parameters.return_value = _ssm_response('test-user')
+    with patch('utils.ssm.get_ssm_client', return_value=client):
+        yield client
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_loads_config_in_single_call(mock_get, mock_ssm):
+    """Test token, list ID and team ID are fetched with one get_parameters call."""
+    mock_get.return_value = Mock(json=Mock(return_value={'custom_items': []}))
+
+    integration = ClickUpTasksIntegration('test-user')
+
+    assert integration.api_token == 'pk_test'
+    assert integration.list_id == 'list-1'
+    assert integration.team_id == 'team-1'
+    mock_ssm.get_parameters.assert_called_once()
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_config_cached_across_instances(mock_get, mock_ssm):
+    """Test SSM values are reused by later instances within the TTL."""
+    mock_get.return_value = Mock(json=Mock(return_value={'custom_items': []}))
+
+    assert ClickUpTasksIntegration('test-user').api_token == 'pk_test'
+    assert ClickUpTasksIntegration('test-user').api_token == 'pk_test'
+
+    mock_ssm.get_parameters.assert_called_once()
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_missing_parameters_raise(mock_get, mock_ssm):
+    """Test missing SSM parameters raise an error naming them."""
+    mock_ssm.get_parameters.return_value = {
+        'Parameters': [],
+        'InvalidParameters': ['/life-stats/clickup/test-user/token']
+    }
+
+    integration = ClickUpTasksIntegration('test-user')
+
+    with pytest.raises(ValueError, match='/life-stats/clickup/test-user/token'):
+        integration.api_token
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_requests_share_authenticated_session(mock_get, mock_ssm):
+    """Test API calls go through one session carrying the auth header."""
+    mock_get.return_value = Mock(json=Mock(return_value={'custom_items': []}))
+
+    integration = ClickUpTasksIntegration('test-user')
+    integration._make_request('/team/team-1')
+
+    assert integration._session.headers['Authorization'] == 'pk_test'
+    assert mock_get.call_count == 1
+    assert mock_get.call_args.args[0] == 'https://api.clickup.com/api/v2/team/team-1'
+
+
+def test_clickup_session_retries_rate_limits(mock_ssm):
+    """Test the session backs off and retries ClickUp 429 responses."""
+    integration = ClickUpTasksIntegration('test-user')
+
+    retries = integration._session.get_adapter('https://api.clickup.com').max_retries
+
+    assert 429 in retries.status_forcelist
+    assert retries.total == 3
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_fetches_all_task_pages(mock_get, mock_ssm):
+    """Test task pages are requested until a short page is returned."""
+    page_sizes = {0: 100, 1: 100, 2: 40}
+
+    def fake_get(url, params=None):
+        if url.endswith('/custom_item'):
+            return Mock(json=Mock(return_value={'custom_items': []}))
+        count = page_sizes.get(params['page'], 0)
+        tasks = [{'id': f"{params['page']}-{i}"} for i in range(count)]
+        return Mock(json=Mock(return_value={'tasks': tasks}))
+
+    mock_get.side_effect = fake_get
+
+    integration = ClickUpTasksIntegration('test-user')
+    tasks = integration._fetch_all_tasks({'statuses[]': 'done'})
+
+    assert len(tasks) == 240
+    assert tasks[0]['id'] == '0-0'
+    assert tasks[-1]['id'] == '2-39'
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_filters_by_date_done_server_side(mock_get, mock_ssm):
+    """Test the window start is sent to ClickUp as a date_done lower bound, with no upper bound."""
+    mock_get.return_value = Mock(json=Mock(return_value={'custom_items': [], 'tasks': []}))
+
+    integration = ClickUpTasksIntegration('test-user')
+    integration.fetch_data(since='2026-01-20', until='2026-01-22')
+
+    params = mock_get.call_args.kwargs['params']
+    assert params['date_done_gt'] == 1768867200000 - 1  # 2026-01-20T00:00:00Z
+    assert 'date_done_lt' not in params
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_keeps_in_range_hours_of_task_done_after_until(mock_get, mock_ssm):
+    """Test a task started before until but done after it still counts its in-range hours."""
+    tasks = [{'id': 'a', 'custom_item_id': 1001, 'tags': [],
+              'start_date': _ms(2026, 1, 21, 22), 'date_done': _ms(2026, 1, 22, 1)}]
+
+    def fake_get(url, params=None):
+        if url.endswith('/custom_item'):
+            return Mock(json=Mock(return_value={'custom_items': [{'id': 1001, 'name': 'Deep Work'}]}))
+        # Apply the date_done bounds the way ClickUp does
+        done = [t for t in tasks
+                if int(t['date_done']) > params.get('date_done_gt', float('-inf'))
+                and int(t['date_done']) < params.get('date_done_lt', float('inf'))]
+        return Mock(json=Mock(return_value={'tasks': done if params['page'] == 0 else []}))
+
+    mock_get.side_effect = fake_get
+
+    integration = ClickUpTasksIntegration('test-user')
+    data_points = integration.fetch_data(since='2026-01-20', until='2026-01-21')
+
+    assert [(p['date'], p['value']['hours']) for p in data_points] == [('2026-01-21', Decimal('2.0'))]
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_split_task_by_day(mock_get, mock_ssm):
+    """Test multi-day tasks are split at UTC midnight."""
+    mock_get.return_value = Mock(json=Mock(return_value={'custom_items': []}))
+    integration = ClickUpTasksIntegration('test-user')
+
+    # 2026-01-20T22:00Z -> 2026-01-22T01:00Z
+    task = {'id': 't1', 'start_date': '1768946400000', 'date_done': '1769043600000'}
+    splits = integration._split_task_by_day(task)
+
+    assert [(start, end) for start, end, _ in splits] == [
+        (1768946400000, 1768953599999),
+        (1768953600000, 1769039999999),
+        (1769040000000, 1769043600000),
+    ]
+    assert all(split_task is task for _, _, split_task in splits)
+
+    # Same-day task is returned as a single span
+    same_day = {'id': 't2', 'start_date': '1768946400000', 'date_done': '1768950000000'}
+    assert integration._split_task_by_day(same_day) == [(1768946400000, 1768950000000, same_day)]
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_custom_types_cached_per_team(mock_get, mock_ssm):
+    """Test custom task types are fetched once per team across instances."""
+    mock_get.return_value = Mock(json=Mock(return_value={
+        'custom_items': [{'id': 1001, 'name': 'Deep Work'}]
+    }))
+
+    first = ClickUpTasksIntegration('test-user')
+    second = ClickUpTasksIntegration('test-user')
+
+    assert first.custom_types == {1001: 'Deep Work'}
+    assert second.custom_types == {1001: 'Deep Work'}
+    assert mock_get.call_count == 1
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_custom_types_failure_not_cached(mock_get, mock_ssm):
+    """Test a failed custom type lookup is retried on next use instead of sticking as empty."""
+    import requests
+
+    mock_get.side_effect = [
+        requests.ConnectionError("transient"),
+        Mock(json=Mock(return_value={'custom_items': [{'id': 1001, 'name': 'Deep Work'}]})),
+    ]
+
+    integration = ClickUpTasksIntegration('test-user')
+
+    assert integration.custom_types == {}
+    assert integration.custom_types == {1001: 'Deep Work'}
+    assert mock_get.call_count == 2
+
+
+def test_clickup_rotated_token_picked_up_after_ssm_ttl(mock_ssm):
+    """Test a registry lookup after the SSM cache expires reads the rotated token."""
+    from integrations.registry import IntegrationRegistry
+
+    registry = IntegrationRegistry()
+    assert registry.get_integration('tasks', 'test-user').api_token == 'pk_test'
+
+    rotated = _ssm_response('test-user')
+    rotated['Parameters'][0]['Value'] = 'pk_rotated'
+    mock_ssm.get_parameters.return_value = rotated
+    ssm._SSM_CACHE.clear()
+
+    assert registry.get_integration('tasks', 'test-user').api_token == 'pk_rotated'
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_fetch_data_groups_by_day_and_type(mock_get, mock_ssm):
+    """Test tasks are split per day and grouped by date and task type."""
+    tasks = [
+        {'id': 'a', 'custom_item_id': 1001, 'tags': [{'name': 'focus'}],
+         'start_date': _ms(2026, 1, 20, 10), 'date_done': _ms(2026, 1, 20, 12)},
+        {'id': 'b', 'custom_item_id': 1001, 'tags': [{'name': 'late'}],
+         'start_date': _ms(2026, 1, 20, 22), 'date_done': _ms(2026, 1, 21, 1)},
+        {'id': 'c', 'custom_item_id': 9999, 'tags': [],
+         'start_date': _ms(2026, 1, 20, 8), 'date_done': _ms(2026, 1, 20, 8, 30)},
+        {'id': 'd', 'custom_item_id': 1001, 'tags': [], 'start_date': None, 'date_done': _ms(2026, 1, 20, 9)},
+    ]
+
+    def fake_get(url, params=None):
+        if url.endswith('/custom_item'):
+            return Mock(json=Mock(return_value={'custom_items': [{'id': 1001, 'name': 'Deep Work'}]}))
+        return Mock(json=Mock(return_value={'tasks': tasks if params['page'] == 0 else []}))
+
+    mock_get.side_effect = fake_get
+
+    integration = ClickUpTasksIntegration('test-user')
+    data_points = integration.fetch_data(since='2026-01-20', until='2026-01-21')
+
+    by_key = {(p['date'], p['metric_type']): p['value'] for p in data_points}
+    assert by_key == {
+        ('2026-01-20', 'deep_work'): {'hours': Decimal('4.0'), 'tags': ['focus', 'late']},
+        ('2026-01-21', 'deep_work'): {'hours': Decimal('1.0'), 'tags': ['late']},
+        ('2026-01-20', 'unknown'): {'hours': Decimal('0.5'), 'tags': []},
+    }
+    assert all(isinstance(p['value']['hours'], Decimal) for p in data_points)
+    assert all('timestamp' in p for p in data_points)
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_same_day_tasks_skip_split(mock_get, mock_ssm):
+    """Test tasks within one UTC day are aggregated without being split."""
+    tasks = [{'id': 'a', 'custom_item_id': 1001, 'tags': [],
+              'start_date': _ms(2026, 1, 20, 10), 'date_done': _ms(2026, 1, 20, 11)}]
+
+    def fake_get(url, params=None):
+        if url.endswith('/custom_item'):
+            return Mock(json=Mock(return_value={'custom_items': []}))
+        return Mock(json=Mock(return_value={'tasks': tasks if params['page'] == 0 else []}))
+
+    mock_get.side_effect = fake_get
+
+    integration = ClickUpTasksIntegration('test-user')
+    with patch.object(integration, '_split_task_by_day') as mock_split:
+        data_points = integration.fetch_data(since='2026-01-20', until='2026-01-20')
+
+    mock_split.assert_not_called()
+    assert data_points[0]['value']['hours'] == Decimal('1.0')
+
+
+@patch('integrations.clickup.requests.Session.get')
+def test_clickup_init_is_lazy(mock_get, mock_ssm):
+    """Test constructing the integration makes no SSM or API calls."""
+    ClickUpTasksIntegration('test-user')
+
+    mock_ssm.get_parameters.assert_not_called()
+    mock_get.assert_not_called()
+
+
+def test_clickup_duration_in_centihours():
+    """Test durations are whole hundredths of an hour, rounded half up."""
+    integration = ClickUpTasksIntegration('test-user')
+
+    assert integration._calculate_duration_centihours(0, 3_600_000) == 100
+    assert integration._calculate_duration_centihours(0, 17_999) == 0
+    assert integration._calculate_duration_centihours(0, 18_000) == 1
+    # A split ending at 23:59:59.999 still counts as the full hour
+    assert integration._calculate_duration_centihours(0, 3_599_999) == 100
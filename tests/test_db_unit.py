@@ -0,0 +1,186 @@
+"""Unit tests for the DynamoDB storage layer (moto)."""
+
+import boto3
+import pytest
+from unittest.mock import patch
+from moto import mock_aws
+from utils import db
+from utils.db import MetricsDB, USERS_REGISTRY_KEY
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    """Create empty metrics and runs tables in a mocked AWS account."""
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-west-2')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('METRICS_TABLE', 'metrics-unit')
+    monkeypatch.setenv('RUNS_TABLE', 'runs-unit')
+    with mock_aws():
+        monkeypatch.setattr(db, '_DYNAMODB_CLIENT', None)
+        client = boto3.client('dynamodb')
+        for name, sort_key in (('metrics-unit', 'metric_date'), ('runs-unit', 'metric_type')):
+            client.create_table(
+                TableName=name,
+                KeySchema=[
+                    {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': sort_key, 'KeyType': 'RANGE'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                    {'AttributeName': sort_key, 'AttributeType': 'S'}
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+        yield boto3.resource('dynamodb')
+        # A session-wide moto mock (MOCK_AWS=true) outlives this one, so leave no tables behind
+        for name in ('metrics-unit', 'runs-unit'):
+            client.delete_table(TableName=name)
+
+
+def test_get_all_users_defaults_when_empty(tables):
+    """Test an empty runs table yields the default user."""
+    assert MetricsDB().get_all_users() == ['default']
+
+
+def test_update_last_run_registers_user(tables):
+    """Test completed runs add the user to the registry item."""
+    metrics_db = MetricsDB()
+    metrics_db.update_last_run('alice', 'steps')
+    metrics_db.update_last_run('bob', 'weather')
+    metrics_db.update_last_run('alice', 'weather')
+
+    item = tables.Table('runs-unit').get_item(Key=USERS_REGISTRY_KEY)['Item']
+    assert item['users'] == {'alice', 'bob'}
+    assert metrics_db.get_all_users() == ['alice', 'bob']
+
+
+def test_get_all_users_seeds_registry_from_scan(tables):
+    """Test a missing registry is rebuilt from the existing runs items."""
+    runs = tables.Table('runs-unit')
+    runs.put_item(Item={'user_id': 'carol', 'metric_type': 'steps', 'last_run_time': '2026-01-01T00:00:00+00:00'})
+
+    assert MetricsDB().get_all_users() == ['carol']
+    assert runs.get_item(Key=USERS_REGISTRY_KEY)['Item']['users'] == {'carol'}
+
+
+def test_register_user_adds_to_existing_registry(tables):
+    """Test a hand-onboarded user joins an existing registry and is listed for scheduled runs."""
+    metrics_db = MetricsDB()
+    metrics_db.update_last_run('alice', 'steps')
+
+    metrics_db.register_user('dave')
+
+    assert metrics_db.get_all_users() == ['alice', 'dave']
+
+
+def test_store_metrics_fills_missing_timestamps(tables):
+    """Test points without a timestamp share one default for the batch."""
+    MetricsDB().store_metrics('alice', 'steps', [
+        {'date': '2026-01-20', 'value': 100},
+        {'date': '2026-01-21', 'value': 200},
+        {'date': '2026-01-22', 'value': 300, 'timestamp': '2026-01-22T12:00:00+00:00'},
+    ])
+
+    items = tables.Table('metrics-unit').scan()['Items']
+    by_date = {item['date']: item for item in items}
+    assert by_date['2026-01-20']['metric_date'] == '2026-01-20#steps'
+    assert by_date['2026-01-20']['timestamp'] == by_date['2026-01-21']['timestamp']
+    assert by_date['2026-01-22']['timestamp'] == '2026-01-22T12:00:00+00:00'
+
+
+def test_store_metrics_multi_mixes_metric_types(tables):
+    """Test points of several metric types are stored in one call."""
+    MetricsDB().store_metrics_multi('alice', [
+        ('deep_work', {'date': '2026-01-20', 'value': {'hours': 2}}),
+        ('admin', {'date': '2026-01-20', 'value': {'hours': 1}}),
+    ])
+
+    items = tables.Table('metrics-unit').scan()['Items']
+    assert sorted(item['metric_date'] for item in items) == ['2026-01-20#admin', '2026-01-20#deep_work']
+
+
+def test_store_metrics_multi_keeps_last_duplicate(tables):
+    """Test a key repeated within one call is written once, with its last value."""
+    MetricsDB().store_metrics('alice', 'steps', [
+        {'date': '2026-01-20', 'value': 100},
+        {'date': '2026-01-20', 'value': 150},
+    ])
+
+    items = tables.Table('metrics-unit').scan()['Items']
+    assert [(item['metric_date'], item['value']) for item in items] == [('2026-01-20#steps', 150)]
+
+
+def test_store_metrics_redrives_unprocessed_items(tables):
+    """Test writes are chunked to 25 and throttled items are retried with backoff."""
+    metrics_db = MetricsDB()
+    write = metrics_db.client.batch_write_item
+    calls = []
+
+    def throttle_first(RequestItems):
+        writes = RequestItems['metrics-unit']
+        calls.append(len(writes))
+        if len(calls) == 1:
+            write(RequestItems={'metrics-unit': writes[1:]})
+            return {'UnprocessedItems': {'metrics-unit': writes[:1]}}
+        return write(RequestItems=RequestItems)
+
+    points = [{'date': f'2026-01-{day:02d}', 'value': day} for day in range(1, 31)]
+    with patch.object(metrics_db.client, 'batch_write_item', side_effect=throttle_first), \
+            patch('utils.db.time.sleep') as mock_sleep:
+        metrics_db.store_metrics('alice', 'steps', points)
+
+    assert calls == [25, 1, 5]
+    mock_sleep.assert_called_once_with(db.UNPROCESSED_BACKOFF)
+    assert len(tables.Table('metrics-unit').scan()['Items']) == 30
+
+
+def test_get_last_runs_batches_pairs(tables):
+    """Test last runs for many pairs come back keyed by (user, metric), skipping unknown pairs."""
+    runs = tables.Table('runs-unit')
+    for i in range(120):
+        runs.put_item(Item={'user_id': f'user-{i}', 'metric_type': 'steps', 'last_run_time': f'run-{i}'})
+
+    pairs = [(f'user-{i}', 'steps') for i in range(120)] + [('nobody', 'steps')]
+    last_runs = MetricsDB().get_last_runs(pairs)
+
+    assert len(last_runs) == 120
+    assert last_runs[('user-7', 'steps')] == 'run-7'
+    assert ('nobody', 'steps') not in last_runs
+
+
+
+def test_handler_invocations_share_one_client(tables):
+    """Test warm invocations reuse the module-level DynamoDB client instead of building new ones."""
+    from lambda_function import handler
+
+    with patch('utils.db.boto3.client', wraps=boto3.client) as make_client:
+        for _ in range(2):
+            handler({'metric': 'no_such_metric', 'user_id': 'alice'}, None)
+
+    make_client.assert_called_once_with('dynamodb', config=db._DYNAMODB_CONFIG)
+    assert MetricsDB().client is db.get_dynamodb_client()
+
+
+def test_get_last_runs_backs_off_and_gives_up_on_unprocessed_keys(tables, caplog):
+    """Test throttled keys are re-driven with capped backoff, then logged and left out."""
+    runs = tables.Table('runs-unit')
+    runs.put_item(Item={'user_id': 'alice', 'metric_type': 'steps', 'last_run_time': 'run-a'})
+    metrics_db = MetricsDB()
+    get = metrics_db.client.batch_get_item
+
+    def always_throttle_one(RequestItems):
+        keys = RequestItems['runs-unit']['Keys']
+        response = get(RequestItems={'runs-unit': {**RequestItems['runs-unit'], 'Keys': keys[:1]}})
+        response['UnprocessedKeys'] = {'runs-unit': {**RequestItems['runs-unit'], 'Keys': keys[-1:]}}
+        return response
+
+    with patch.object(metrics_db.client, 'batch_get_item', side_effect=always_throttle_one), \
+            patch('utils.db.time.sleep') as mock_sleep:
+        last_runs = metrics_db.get_last_runs([('alice', 'steps'), ('bob', 'steps')])
+
+    assert last_runs == {('alice', 'steps'): 'run-a'}
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [
+        db.UNPROCESSED_BACKOFF * 2 ** i for i in range(db.UNPROCESSED_MAX_RETRIES)
+    ]
+    assert f"1 last run keys still unprocessed after {db.UNPROCESSED_MAX_RETRIES} retries" in caplog.text
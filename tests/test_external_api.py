@@ -2,154 +2,66 @@
 External API integration tests.
 Tests connectivity and authentication with external services (Google Fit, etc.).
 """
-from botocore.exceptions import ClientError
-import boto3
-import os
-import sys
 import pytest
-from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-
-
-@pytest.fixture(scope='session')
-def ssm_client():
-    """SSM client for retrieving credentials."""
-    return boto3.client('ssm')
-
-
-@pytest.fixture(scope='session')
-def google_fit_credentials_exist(ssm_client):
-    """Check if Google Fit credentials are configured in SSM."""
-    try:
-        ssm_client.get_parameter(Name='/life-stats/google-fit/client-id', WithDecryption=True)
-        ssm_client.get_parameter(Name='/life-stats/google-fit/client-secret', WithDecryption=True)
-        return True
-    except ClientError:
-        return False
+# Google Fit requires specific OAuth scopes; listed here so we're aware of the required scopes
+REQUIRED_SCOPES = (
+    'https://www.googleapis.com/auth/fitness.activity.read',
+    'https://www.googleapis.com/auth/fitness.body.read',
+    'https://www.googleapis.com/auth/fitness.location.read',
+)
 
 
 @pytest.fixture(scope='session')
-def test_user_with_oauth(ssm_client):
-    """Create test user with OAuth token if needed."""
-    test_user_id = os.environ.get('TEST_USER_ID', 'zerocool')
-
-    # Check if token exists
-    try:
-        ssm_client.get_parameter(
-            Name=f'/life-stats/google-fit/{test_user_id}/token',
-            WithDecryption=True
-        )
-        return test_user_id
-    except ClientError:
-        # Token doesn't exist - try to generate
-        if os.environ.get('AUTO_GENERATE_OAUTH', 'true').lower() == 'true':
-            from google_auth_oauthlib.flow import InstalledAppFlow
-
-            # Get client credentials
-            client_id = ssm_client.get_parameter(
-                Name='/life-stats/google-fit/client-id',
-                WithDecryption=True
-            )['Parameter']['Value']
-
-            client_secret = ssm_client.get_parameter(
-                Name='/life-stats/google-fit/client-secret',
-                WithDecryption=True
-            )['Parameter']['Value']
-
-            # Run OAuth flow
-            client_config = {
-                "installed": {
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": ["http://localhost:8080/"]
-                }
-            }
-
-            scopes = [
-                'https://www.googleapis.com/auth/fitness.activity.read',
-                'https://www.googleapis.com/auth/fitness.body.read',
-            ]
-
-            flow = InstalledAppFlow.from_client_config(client_config, scopes)
-            credentials = flow.run_local_server(port=8080)
+def google_fit_integration():
+    """GoogleFitStepsIntegration class, imported once on first use rather than at collection."""
+    from integrations.google_fit import GoogleFitStepsIntegration
+    return GoogleFitStepsIntegration
 
-            # Store token
-            ssm_client.put_parameter(
-                Name=f'/life-stats/google-fit/{test_user_id}/token',
-                Value=credentials.token,
-                Type='SecureString',
-                Overwrite=True
-            )
 
-            return test_user_id
-        else:
-            pytest.fail(
-                f"OAuth token not found for {test_user_id}. "
-                "Set AUTO_GENERATE_OAUTH=true or run: "
-                "python scripts/generate-oauth-token.py")
+def test_google_fit_credentials_configured(google_fit_client_creds):
+    """Test that Google Fit credentials are stored in SSM."""
+    assert google_fit_client_creds is not None, "Google Fit client credentials not found in SSM"
+    assert len(google_fit_client_creds['client_id']) > 0
+    assert len(google_fit_client_creds['client_secret']) > 0
 
 
-def test_google_fit_credentials_configured(ssm_client):
-    """Test that Google Fit credentials are stored in SSM."""
-    client_id = ssm_client.get_parameter(
-        Name='/life-stats/google-fit/client-id',
-        WithDecryption=True
-    )
-    assert client_id['Parameter']['Value'] is not None
-    assert len(client_id['Parameter']['Value']) > 0
-
-    client_secret = ssm_client.get_parameter(
-        Name='/life-stats/google-fit/client-secret',
-        WithDecryption=True
-    )
-    assert client_secret['Parameter']['Value'] is not None
-    assert len(client_secret['Parameter']['Value']) > 0
-
-
-def test_google_fit_integration_instantiation(google_fit_credentials_exist):
+def test_google_fit_integration_instantiation(google_fit_integration, google_fit_credentials_exist):
     """Test that Google Fit integration can be instantiated."""
     if not google_fit_credentials_exist:
         pytest.skip("Google Fit credentials not configured")
 
-    from integrations.google_fit import GoogleFitStepsIntegration
-
     # Should be able to instantiate (may fail on credential retrieval if no user token)
     try:
-        integration = GoogleFitStepsIntegration('test-user')
+        integration = google_fit_integration('test-user')
         assert integration is not None
         assert integration.user_id == 'test-user'
     except Exception as e:
         # Expected if user token doesn't exist
-        assert 'Parameter /life-stats/google-fit/test-user/token not found' in str(e) or \
+        assert 'Parameters not found: /life-stats/google-fit/test-user/token' in str(e) or \
+               'Parameter /life-stats/google-fit/test-user/token not found' in str(e) or \
                'ParameterNotFound' in str(e)
 
 
-def test_google_fit_api_imports():
+@pytest.mark.parametrize('module, name', [
+    ('google.oauth2.credentials', 'Credentials'),
+    ('googleapiclient.discovery', 'build'),
+])
+def test_google_fit_api_imports(module, name):
     """Test that Google API client libraries are available."""
-    try:
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-        assert Credentials is not None
-        assert build is not None
-    except ImportError as e:
-        pytest.fail(f"Google API client libraries not available: {e}")
+    assert getattr(pytest.importorskip(module), name) is not None
 
 
-def test_google_fit_integration_base_class():
+def test_google_fit_integration_base_class(google_fit_integration):
     """Test that Google Fit integration inherits from base correctly."""
-    from integrations.google_fit import GoogleFitStepsIntegration
     from integrations.base import BaseIntegration
 
-    assert issubclass(GoogleFitStepsIntegration, BaseIntegration)
+    assert issubclass(google_fit_integration, BaseIntegration)
 
     # Check required methods exist
-    assert hasattr(GoogleFitStepsIntegration, 'fetch_data')
-    assert callable(getattr(GoogleFitStepsIntegration, 'fetch_data'))
+    assert hasattr(google_fit_integration, 'fetch_data')
+    assert callable(getattr(google_fit_integration, 'fetch_data'))
 
 
 def test_google_fit_date_range_calculation():
@@ -173,56 +85,34 @@ def test_google_fit_date_range_calculation():
     assert (end - start).days <= 2  # Should be ~1 day
 
 
-def test_integration_registry_has_google_fit():
+def test_integration_registry_has_google_fit(google_fit_integration, integration_registry):
     """Test that Google Fit integration is registered."""
-    from integrations.registry import IntegrationRegistry
-    from integrations.google_fit import GoogleFitStepsIntegration
-
-    registry = IntegrationRegistry()
-    metrics = registry.list_metrics()
-
-    assert 'steps' in metrics
+    assert 'steps' in integration_registry._integrations
 
     # Verify the integration class is registered (don't instantiate - requires user token)
-    integration_class = registry._integrations.get('steps')
-    assert integration_class == GoogleFitStepsIntegration
-    assert integration_class.__name__ == 'GoogleFitStepsIntegration'
+    assert integration_registry._integrations['steps'] is google_fit_integration
 
 
 def test_google_fit_api_scopes():
     """Test that Google Fit API scopes are correctly defined."""
-    # Google Fit requires specific OAuth scopes
-    # This test ensures we're aware of the required scopes
-    required_scopes = [
-        'https://www.googleapis.com/auth/fitness.activity.read',
-        'https://www.googleapis.com/auth/fitness.body.read',
-        'https://www.googleapis.com/auth/fitness.location.read'
-    ]
-
-    # Just verify we know what scopes are needed
-    # Actual scope validation happens during OAuth flow
-    assert len(required_scopes) > 0
-
-
-@pytest.mark.skipif(
-    os.environ.get('SKIP_LIVE_API_TESTS', 'false').lower() == 'true',
-    reason="Live API tests disabled - set SKIP_LIVE_API_TESTS=false to enable"
-)
-def test_google_fit_live_api_call(test_user_with_oauth):
+    # Just verify we know what scopes are needed; actual scope validation happens during OAuth flow
+    assert REQUIRED_SCOPES
+    assert all(scope.startswith('https://www.googleapis.com/auth/fitness.') for scope in REQUIRED_SCOPES)
+
+
+@pytest.mark.live
+def test_google_fit_live_api_call(google_fit_integration, test_user_with_oauth, now_utc):
     """
     Test actual Google Fit API call with real credentials.
     REQUIRED: This test must pass to ensure Google Fit integration works.
     """
-    from integrations.google_fit import GoogleFitStepsIntegration
-
     test_user_id = test_user_with_oauth
 
     try:
-        integration = GoogleFitStepsIntegration(test_user_id)
+        integration = google_fit_integration(test_user_id)
 
-        # Fetch last 2 days of data
-        since = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
-        data = integration.fetch_data(since)
+        # Fetch only today: the window widens to whole local days, so this is a single daily bucket
+        data = integration.fetch_data(since=now_utc, until=now_utc)
 
         # Should return list (may be empty if no data)
         assert isinstance(data, list), "Google Fit API should return a list"
@@ -241,20 +131,18 @@ def test_google_fit_live_api_call(test_user_with_oauth):
         pytest.fail(f"Google Fit integration failed - REQUIRED for deployment: {e}")
 
 
-def test_error_handling_invalid_credentials():
+def test_error_handling_invalid_credentials(google_fit_integration):
     """Test that integration handles invalid credentials gracefully."""
-    from integrations.google_fit import GoogleFitStepsIntegration
-
     # Try to instantiate with non-existent user
     with pytest.raises(Exception) as exc_info:
-        GoogleFitStepsIntegration('nonexistent-user-12345')
+        google_fit_integration('nonexistent-user-12345')
 
     # Should raise an error about missing credentials
     assert 'Parameter' in str(exc_info.value) or 'not found' in str(
         exc_info.value).lower()
 
 
-def test_integration_data_format():
+def test_integration_data_format(now_utc):
     """Test that integration returns data in expected format."""
     from integrations.base import BaseIntegration
 
@@ -264,7 +152,7 @@ def test_integration_data_format():
                 {
                     'date': '2026-01-17',
                     'value': 8542,
-                    'timestamp': datetime.now(timezone.utc).isoformat()
+                    'timestamp': now_utc.isoformat()
                 }
             ]
 
@@ -3,23 +3,17 @@ Functional tests for Life Stats Lambda function.
 Tests against real AWS resources (DynamoDB, SSM).
 """
 import os
-import sys
 import json
+import uuid
 import pytest
-from datetime import datetime, timezone, timedelta
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 # Set test environment
 os.environ['METRICS_TABLE'] = 'life-stats-metrics-test'
 os.environ['RUNS_TABLE'] = 'life-stats-runs-test'
 os.environ['AWS_DEFAULT_REGION'] = os.environ.get('AWS_REGION', 'us-west-2')
 
-import boto3
-from lambda_function import handler
-
 
 class MockContext:
     """Mock Lambda context for testing."""
@@ -30,53 +24,49 @@ class MockContext:
 
 
 @pytest.fixture(scope='session')
-def dynamodb_client():
-    """DynamoDB client for test setup/teardown."""
-    return boto3.client('dynamodb')
-
+def handler():
+    """Lambda handler, imported on first use so collection doesn't load boto3 and the integrations."""
+    from lambda_function import handler
+    return handler
 
-@pytest.fixture(scope='session')
-def setup_dynamodb_tables(dynamodb_client):
-    """Create test DynamoDB tables."""
 
-    metrics_table = os.environ['METRICS_TABLE']
-    runs_table = os.environ['RUNS_TABLE']
-
-    # Create metrics table
+def _ensure_table(dynamodb_client, table_name, sort_key):
+    """Create a user_id-keyed test table, skipping creation and the waiter when it already exists."""
     try:
-        dynamodb_client.create_table(
-            TableName=metrics_table,
-            KeySchema=[
-                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
-                {'AttributeName': 'metric_date', 'KeyType': 'RANGE'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'user_id', 'AttributeType': 'S'},
-                {'AttributeName': 'metric_date', 'AttributeType': 'S'}
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        dynamodb_client.get_waiter('table_exists').wait(TableName=metrics_table)
-    except dynamodb_client.exceptions.ResourceInUseException:
+        status = dynamodb_client.describe_table(TableName=table_name)['Table']['TableStatus']
+        if status != 'ACTIVE':
+            dynamodb_client.get_waiter('table_exists').wait(TableName=table_name)
+        return
+    except dynamodb_client.exceptions.ResourceNotFoundException:
         pass
 
-    # Create runs table
     try:
         dynamodb_client.create_table(
-            TableName=runs_table,
+            TableName=table_name,
             KeySchema=[
                 {'AttributeName': 'user_id', 'KeyType': 'HASH'},
-                {'AttributeName': 'metric_type', 'KeyType': 'RANGE'}
+                {'AttributeName': sort_key, 'KeyType': 'RANGE'}
             ],
             AttributeDefinitions=[
                 {'AttributeName': 'user_id', 'AttributeType': 'S'},
-                {'AttributeName': 'metric_type', 'AttributeType': 'S'}
+                {'AttributeName': sort_key, 'AttributeType': 'S'}
             ],
             BillingMode='PAY_PER_REQUEST'
         )
-        dynamodb_client.get_waiter('table_exists').wait(TableName=runs_table)
     except dynamodb_client.exceptions.ResourceInUseException:
-        pass
+        pass  # Another worker created it between the describe and the create
+    dynamodb_client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def setup_dynamodb_tables(dynamodb_client):
+    """Create test DynamoDB tables once for the whole run."""
+
+    metrics_table = os.environ['METRICS_TABLE']
+    runs_table = os.environ['RUNS_TABLE']
+
+    _ensure_table(dynamodb_client, metrics_table, 'metric_date')
+    _ensure_table(dynamodb_client, runs_table, 'metric_type')
 
     yield
 
@@ -86,26 +76,38 @@ def setup_dynamodb_tables(dynamodb_client):
 
 
 @pytest.fixture
-def clean_tables():
-    """Clean test tables before each test."""
-    dynamodb = boto3.resource('dynamodb')
-    metrics_table = dynamodb.Table(os.environ['METRICS_TABLE'])
-    runs_table = dynamodb.Table(os.environ['RUNS_TABLE'])
-
-    # Clear metrics table
-    scan = metrics_table.scan()
-    with metrics_table.batch_writer() as batch:
-        for item in scan.get('Items', []):
-            batch.delete_item(Key={'user_id': item['user_id'], 'metric_date': item['metric_date']})
-
-    # Clear runs table
-    scan = runs_table.scan()
-    with runs_table.batch_writer() as batch:
-        for item in scan.get('Items', []):
-            batch.delete_item(Key={'user_id': item['user_id'], 'metric_type': item['metric_type']})
-
-
-def test_lambda_handler_no_users(setup_dynamodb_tables, clean_tables):
+def user_id(metrics_table, runs_table):
+    """
+    A user ID unique to this test, so tests never collide and the tables need no wiping.
+
+    On teardown only this user's items (and their users registry entry) are deleted.
+    """
+    from boto3.dynamodb.conditions import Key
+    from utils.db import USERS_REGISTRY_KEY
+
+    test_user_id = f"test-{uuid.uuid4()}"
+    yield test_user_id
+
+    for table, sort_key in ((metrics_table, 'metric_date'), (runs_table, 'metric_type')):
+        # Page through the user's partition reading only the keys needed to delete each item
+        query = {'KeyConditionExpression': Key('user_id').eq(test_user_id), 'ProjectionExpression': sort_key}
+        with table.batch_writer() as batch:
+            while True:
+                response = table.query(**query)
+                for item in response['Items']:
+                    batch.delete_item(Key={'user_id': test_user_id, sort_key: item[sort_key]})
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    runs_table.update_item(
+        Key=USERS_REGISTRY_KEY,
+        UpdateExpression='DELETE #users :user',
+        ExpressionAttributeNames={'#users': 'users'},
+        ExpressionAttributeValues={':user': {test_user_id}}
+    )
+
+
+def test_lambda_handler_no_users(handler):
     """Test Lambda with no users configured."""
     event = {}
     response = handler(event, MockContext())
@@ -116,19 +118,16 @@ def test_lambda_handler_no_users(setup_dynamodb_tables, clean_tables):
     assert 'results' in body or 'errors' in body
 
 
-def test_lambda_handler_with_mock_user(setup_dynamodb_tables, clean_tables):
+def test_lambda_handler_with_mock_user(handler, user_id, runs_table, now_utc):
     """Test Lambda with a mock user in runs table."""
-    dynamodb = boto3.resource('dynamodb')
-    runs_table = dynamodb.Table(os.environ['RUNS_TABLE'])
-
     # Add mock user
     runs_table.put_item(Item={
-        'user_id': 'test-user',
+        'user_id': user_id,
         'metric_type': 'steps',
-        'last_run_time': (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        'last_run_time': (now_utc - timedelta(days=1)).isoformat()
     })
 
-    event = {'user_id': 'test-user', 'metric': 'steps'}
+    event = {'user_id': user_id, 'metric': 'steps'}
     response = handler(event, MockContext())
 
     # Should fail because no SSM credentials, but Lambda should handle gracefully
@@ -137,52 +136,50 @@ def test_lambda_handler_with_mock_user(setup_dynamodb_tables, clean_tables):
     assert 'results' in body or 'errors' in body or 'error' in body
 
 
-def test_database_schema_metrics(setup_dynamodb_tables, clean_tables):
+def test_database_schema_metrics(user_id, metrics_table, now_utc):
     """Test metrics table schema."""
+    from boto3.dynamodb.conditions import Key
     from utils.db import MetricsDB
 
     db = MetricsDB()
     test_data = [
-        {'date': '2026-01-17', 'value': 8542, 'timestamp': datetime.now(timezone.utc).isoformat()},
-        {'date': '2026-01-16', 'value': 7231, 'timestamp': datetime.now(timezone.utc).isoformat()}
+        {'date': '2026-01-17', 'value': 8542, 'timestamp': now_utc.isoformat()},
+        {'date': '2026-01-16', 'value': 7231, 'timestamp': now_utc.isoformat()}
     ]
 
-    db.store_metrics('test-user', 'steps', test_data)
+    db.store_metrics(user_id, 'steps', test_data)
 
     # Verify data stored correctly
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(os.environ['METRICS_TABLE'])
-
-    response = table.query(
-        KeyConditionExpression='user_id = :uid',
-        ExpressionAttributeValues={':uid': 'test-user'}
+    response = metrics_table.query(
+        KeyConditionExpression=Key('user_id').eq(user_id),
+        ConsistentRead=True
     )
 
     items = response['Items']
     assert len(items) == 2
     assert all(item['metric_type'] == 'steps' for item in items)
-    assert all(item['user_id'] == 'test-user' for item in items)
+    assert all(item['user_id'] == user_id for item in items)
 
     # Verify chronological ordering (date#metric_type format)
     dates = [item['metric_date'] for item in items]
     assert dates == sorted(dates)
 
 
-def test_database_last_run_tracking(setup_dynamodb_tables, clean_tables):
+def test_database_last_run_tracking(user_id):
     """Test last run tracking."""
     from utils.db import MetricsDB
 
     db = MetricsDB()
 
     # Initially no last run
-    last_run = db.get_last_run('test-user', 'steps')
+    last_run = db.get_last_run(user_id, 'steps')
     assert last_run is None
 
     # Update last run
-    db.update_last_run('test-user', 'steps')
+    db.update_last_run(user_id, 'steps')
 
     # Verify last run stored
-    last_run = db.get_last_run('test-user', 'steps')
+    last_run = db.get_last_run(user_id, 'steps')
     assert last_run is not None
 
     # Verify it's a valid ISO timestamp
@@ -190,65 +187,63 @@ def test_database_last_run_tracking(setup_dynamodb_tables, clean_tables):
     assert isinstance(parsed, datetime)
 
 
-def test_integration_registry():
+def test_integration_registry(integration_registry):
     """Test integration registry."""
-    from integrations.registry import IntegrationRegistry
-
-    registry = IntegrationRegistry()
-
     # List available metrics
-    metrics = registry.list_metrics()
+    metrics = integration_registry.list_metrics()
     assert 'steps' in metrics
     assert len(metrics) > 0
 
     # Get integration (will fail without credentials, but should instantiate)
     try:
-        integration = registry.get_integration('steps', 'test-user')
+        integration = integration_registry.get_integration('steps', 'test-user')
         assert integration is not None
     except Exception:
         # Expected if SSM credentials not available
         pass
 
 
-def test_lambda_event_formats(setup_dynamodb_tables, clean_tables):
+def test_lambda_event_formats(handler, user_id):
     """Test different Lambda event formats."""
     test_cases = [
         {},  # No parameters - all metrics, all users
         {'metric': 'steps'},  # Specific metric
-        {'user_id': 'test-user'},  # Specific user
-        {'metric': 'steps', 'user_id': 'test-user'}  # Both
+        {'user_id': user_id},  # Specific user
+        {'metric': 'steps', 'user_id': user_id}  # Both
     ]
 
-    for event in test_cases:
-        response = handler(event, MockContext())
+    # The events are independent, so their AWS round trips overlap rather than add up
+    with ThreadPoolExecutor(max_workers=len(test_cases)) as pool:
+        responses = list(pool.map(lambda event: handler(event, MockContext()), test_cases))
+
+    for response in responses:
         assert 'statusCode' in response
         assert 'body' in response
         body = json.loads(response['body'])
         assert isinstance(body, dict)
 
 
-def test_idempotency(setup_dynamodb_tables, clean_tables):
+def test_idempotency(user_id, metrics_table, now_utc):
     """Test that running Lambda multiple times is idempotent."""
+    from boto3.dynamodb.conditions import Key
     from utils.db import MetricsDB
 
     db = MetricsDB()
 
     # Store same data twice
     test_data = [
-        {'date': '2026-01-17', 'value': 8542, 'timestamp': datetime.now(timezone.utc).isoformat()}
+        {'date': '2026-01-17', 'value': 8542, 'timestamp': now_utc.isoformat()}
     ]
 
-    db.store_metrics('test-user', 'steps', test_data)
-    db.store_metrics('test-user', 'steps', test_data)
-
-    # Should overwrite, not duplicate
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(os.environ['METRICS_TABLE'])
+    db.store_metrics(user_id, 'steps', test_data)
+    db.store_metrics(user_id, 'steps', test_data)
 
-    response = table.query(
-        KeyConditionExpression='user_id = :uid AND begins_with(metric_date, :date)',
-        ExpressionAttributeValues={':uid': 'test-user', ':date': '2026-01-17'}
+    # Should overwrite, not duplicate: count every item under the date prefix, not just the expected key
+    response = metrics_table.query(
+        KeyConditionExpression=Key('user_id').eq(user_id) & Key('metric_date').begins_with('2026-01-17'),
+        Select='COUNT',
+        ConsistentRead=True
     )
 
     # Should only have one item (overwritten)
-    assert len(response['Items']) == 1
+    assert response['Count'] == 1
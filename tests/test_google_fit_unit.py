@@ -0,0 +1,102 @@
+"""Unit tests for Google Fit steps integration (mocked)."""
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+from integrations import google_fit
+from integrations.google_fit import GoogleFitStepsIntegration
+
+TOKEN = json.dumps({
+    'token': 'access', 'refresh_token': 'refresh', 'token_uri': 'https://oauth2.googleapis.com/token',
+    'client_id': 'client', 'client_secret': 'secret', 'scopes': ['https://www.googleapis.com/auth/fitness.activity.read']
+})
+
+
+def _aggregate_response(steps):
+    """Build an aggregate response with one daily bucket (2026-01-20 in America/Edmonton)."""
+    return {'bucket': [{'startTimeMillis': str(1768892400 * 1000), 'dataset': [{'point': [
+        {'startTimeNanos': str(1768910400 * 10**9), 'value': [{'intVal': steps}]}
+    ]}]}]}
+
+
+@pytest.fixture(autouse=True)
+def clear_services():
+    """Reset the per-user service cache between tests."""
+    google_fit._SERVICE_CACHE.clear()
+    yield
+    google_fit._SERVICE_CACHE.clear()
+
+
+@pytest.fixture
+def mock_service():
+    """Patch credential lookup and service discovery with a mocked Fitness service."""
+    service = Mock()
+    with patch('integrations.google_fit.get_parameter', return_value=TOKEN), \
+            patch('integrations.google_fit.build', return_value=service):
+        yield service
+
+
+def test_google_fit_fetch_data(mock_service):
+    """Test a single fetch parses daily step totals."""
+    mock_service.users().dataset().aggregate().execute.return_value = _aggregate_response(1234)
+
+    data_points = GoogleFitStepsIntegration('test-user').fetch_data(since='2026-01-20', until='2026-01-20')
+
+    assert [(p['date'], p['value']) for p in data_points] == [('2026-01-20', 1234)]
+
+
+def test_google_fit_fetch_many_uses_one_batch(mock_service):
+    """Test several users are fetched through a single batch request."""
+    added = []
+    batch = Mock()
+    batch.add.side_effect = lambda request, request_id: added.append(request_id)
+
+    def new_batch(callback):
+        def execute():
+            callback('0', _aggregate_response(100), None)
+            callback('1', None, RuntimeError('quota exceeded'))
+        batch.execute.side_effect = execute
+        return batch
+
+    mock_service.new_batch_http_request.side_effect = new_batch
+    jobs = [(GoogleFitStepsIntegration('alice'), '2026-01-20'), (GoogleFitStepsIntegration('bob'), '2026-01-20')]
+
+    outcomes = GoogleFitStepsIntegration.fetch_many(jobs, until='2026-01-20')
+
+    assert added == ['0', '1']
+    batch.execute.assert_called_once()
+    assert [p['value'] for p in outcomes[0]] == [100]
+    assert isinstance(outcomes[1], RuntimeError)
+
+
+def test_google_fit_fetch_many_isolates_malformed_response(mock_service):
+    """Test a malformed response fails only its own user while the rest of the batch succeeds."""
+    batch = Mock()
+
+    def new_batch(callback):
+        def execute():
+            callback('0', {'bucket': [{'dataset': []}]}, None)  # bucket without startTimeMillis
+            callback('1', _aggregate_response(200), None)
+            callback('2', _aggregate_response(300), None)
+        batch.execute.side_effect = execute
+        return batch
+
+    mock_service.new_batch_http_request.side_effect = new_batch
+    jobs = [(GoogleFitStepsIntegration(user), '2026-01-20') for user in ('alice', 'bob', 'carol')]
+
+    outcomes = GoogleFitStepsIntegration.fetch_many(jobs, until='2026-01-20')
+
+    assert isinstance(outcomes[0], KeyError)
+    assert [p['value'] for p in outcomes[1]] == [200]
+    assert [p['value'] for p in outcomes[2]] == [300]
+
+
+def test_google_fit_builds_service_offline(mock_service):
+    """Test the Fitness service is built from the bundled discovery document, once per user."""
+    integration = GoogleFitStepsIntegration('test-user')
+    integration._get_service()
+    integration._get_service()
+
+    google_fit.build.assert_called_once_with(
+        'fitness', 'v1', credentials=integration.credentials, static_discovery=True, cache_discovery=False
+    )
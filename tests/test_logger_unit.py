@@ -0,0 +1,20 @@
+"""Unit tests for logger setup."""
+
+import logging
+from utils.logger import setup_logger
+
+
+def test_setup_logger_honours_log_level(monkeypatch):
+    """Test LOG_LEVEL is applied case-insensitively."""
+    monkeypatch.setenv('LOG_LEVEL', 'debug')
+    assert setup_logger('test-logger-debug').level == logging.DEBUG
+
+
+def test_setup_logger_falls_back_on_unknown_level(monkeypatch, caplog):
+    """Test a mistyped LOG_LEVEL falls back to INFO with a warning instead of raising."""
+    monkeypatch.setenv('LOG_LEVEL', 'VERBOSE')
+    with caplog.at_level(logging.WARNING):
+        logger = setup_logger('test-logger-unknown')
+
+    assert logger.level == logging.INFO
+    assert "Unknown LOG_LEVEL 'VERBOSE'" in caplog.text
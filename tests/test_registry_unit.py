@@ -0,0 +1,21 @@
+"""Unit tests for the integration registry."""
+
+import pytest
+from integrations.registry import IntegrationRegistry
+
+
+def test_registry_builds_fresh_integration_per_call():
+    """Test each lookup builds a new instance so per-instance state never outlives an invocation."""
+    registry = IntegrationRegistry()
+
+    first = registry.get_integration('weather', 'test-user')
+    second = registry.get_integration('weather', 'test-user')
+
+    assert first is not second
+    assert first.user_id == second.user_id == 'test-user'
+
+
+def test_registry_unknown_metric_raises():
+    """Test an unregistered metric name is rejected."""
+    with pytest.raises(ValueError, match='Unknown metric: nope'):
+        IntegrationRegistry().get_integration('nope', 'test-user')
@@ -0,0 +1,72 @@
+"""Unit tests for the shared SSM parameter helpers (mocked)."""
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+from utils import ssm
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch):
+    """Reset the parameter cache and run outside Lambda unless a test opts in."""
+    monkeypatch.delenv('AWS_SESSION_TOKEN', raising=False)
+    monkeypatch.delenv('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT', raising=False)
+    ssm._SSM_CACHE.clear()
+    yield
+    ssm._SSM_CACHE.clear()
+
+
+@pytest.fixture
+def mock_client():
+    """Patch the boto3 SSM client with one that echoes parameter names as values."""
+    client = Mock()
+    client.get_parameters.side_effect = lambda Names, WithDecryption: {
+        'Parameters': [{'Name': n, 'Value': n} for n in Names], 'InvalidParameters': []
+    }
+    with patch('utils.ssm.get_ssm_client', return_value=client):
+        yield client
+
+
+def test_get_parameters_batches_of_ten(mock_client):
+    """Test parameter lookups are chunked to the GetParameters limit."""
+    names = [f'/p/{i}' for i in range(12)]
+
+    values = ssm.get_parameters(names, decrypt=False)
+
+    assert values == {n: n for n in names}
+    assert [len(c.kwargs['Names']) for c in mock_client.get_parameters.call_args_list] == [10, 2]
+
+
+def test_get_parameter_cached_within_ttl(mock_client):
+    """Test repeated lookups are served from the module cache."""
+    assert ssm.get_parameter('/p/token') == '/p/token'
+    assert ssm.get_parameter('/p/token') == '/p/token'
+
+    mock_client.get_parameters.assert_called_once()
+
+
+def test_get_parameter_uses_lambda_extension(mock_client, monkeypatch):
+    """Test the Parameters and Secrets extension is preferred when configured."""
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'session-token')
+    monkeypatch.setenv('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT', '2773')
+    body = json.dumps({'Parameter': {'Name': '/p/token', 'Value': 'secret'}}).encode()
+
+    with patch.object(ssm._EXTENSION_HTTP, 'request', return_value=Mock(status=200, data=body)) as mock_request:
+        assert ssm.get_parameter('/p/token') == 'secret'
+
+    args, kwargs = mock_request.call_args
+    assert args[1] == 'http://localhost:2773/systemsmanager/parameters/get'
+    assert kwargs['fields'] == {'name': '/p/token', 'withDecryption': 'true'}
+    assert kwargs['headers'] == {'X-Aws-Parameters-Secrets-Token': 'session-token'}
+    mock_client.get_parameters.assert_not_called()
+
+
+def test_get_parameter_extension_not_found(mock_client, monkeypatch):
+    """Test a missing parameter reported by the extension raises an error naming it."""
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'session-token')
+    monkeypatch.setenv('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT', '2773')
+    response = Mock(status=400, data=b'{"__type":"ParameterNotFound"}')
+
+    with patch.object(ssm._EXTENSION_HTTP, 'request', return_value=response):
+        with pytest.raises(ValueError, match='Parameters not found: /p/missing'):
+            ssm.get_parameter('/p/missing')
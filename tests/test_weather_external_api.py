@@ -1,15 +1,29 @@
 """External API tests for Open-Meteo weather integration."""
 # -*- coding: utf-8 -*-
+import pytest
 import requests
 import time
-from datetime import datetime, timedelta
+from datetime import timedelta
 
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 
-def _make_request_with_retry(url, params, max_retries=3, timeout=30):
-    """Make HTTP request with retry logic for flaky networks."""
+# The union of every daily field the tests below inspect
+DAILY_FIELDS = [
+    'temperature_2m_max',
+    'temperature_2m_min',
+    'relative_humidity_2m_mean',
+    'surface_pressure_mean',
+    'precipitation_sum',
+    'wind_speed_10m_max',
+    'sunshine_duration'
+]
+
+
+def _make_request_with_retry(session, url, params, max_retries=3, timeout=30):
+    """Make HTTP request on the shared session with retry logic for flaky networks."""
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, params=params, timeout=timeout)
+            response = session.get(url, params=params, timeout=timeout)
             return response
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
             if attempt == max_retries - 1:
@@ -18,55 +32,42 @@ def _make_request_with_retry(url, params, max_retries=3, timeout=30):
     return None
 
 
-def test_open_meteo_api_connectivity():
-    """Test Open-Meteo API is accessible."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
+@pytest.fixture(scope='session')
+def om_full_response(open_meteo_http, now_utc):
+    """
+    One archive response for Eau Claire, Calgary covering every field and the three days up to yesterday.
 
-    # Simple ping with minimal parameters
+    The connectivity, structure, coordinate and data quality checks all read it, so they cost a single request.
+    """
     params = {
-        'latitude': 51.05,
-        'longitude': -114.07,
-        'start_date': '2026-01-20',
-        'end_date': '2026-01-20',
-        'daily': 'temperature_2m_max'
+        'latitude': 51.05306,
+        'longitude': -114.07139,
+        'start_date': (now_utc - timedelta(days=3)).strftime('%Y-%m-%d'),
+        'end_date': (now_utc - timedelta(days=1)).strftime('%Y-%m-%d'),
+        'daily': DAILY_FIELDS,
+        'timezone': 'America/Edmonton'
     }
+    return _make_request_with_retry(open_meteo_http, ARCHIVE_URL, params)
 
-    response = _make_request_with_retry(url, params)
-    assert response.status_code == 200
 
-    data = response.json()
+def test_open_meteo_api_connectivity(om_full_response):
+    """Test Open-Meteo API is accessible."""
+    # Also verifies no API key is required: the request carried no key or auth headers
+    assert 'Authorization' not in om_full_response.request.headers
+    assert 'apikey' not in om_full_response.request.url
+    assert om_full_response.status_code == 200
+
+    data = om_full_response.json()
     assert 'latitude' in data
     assert 'longitude' in data
     assert 'daily' in data
 
 
-def test_open_meteo_api_response_structure():
+def test_open_meteo_api_response_structure(om_full_response):
     """Test Open-Meteo API returns expected data structure."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
-
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    assert om_full_response.status_code == 200
 
-    params = {
-        'latitude': 51.05306,
-        'longitude': -114.07139,
-        'start_date': yesterday,
-        'end_date': yesterday,
-        'daily': [
-            'temperature_2m_max',
-            'temperature_2m_min',
-            'relative_humidity_2m_mean',
-            'surface_pressure_mean',
-            'precipitation_sum',
-            'wind_speed_10m_max',
-            'sunshine_duration'
-        ],
-        'timezone': 'America/Edmonton'
-    }
-
-    response = _make_request_with_retry(url, params)
-    assert response.status_code == 200
-
-    data = response.json()
+    data = om_full_response.json()
 
     # Check top-level structure
     assert 'latitude' in data
@@ -78,13 +79,8 @@ def test_open_meteo_api_response_structure():
     # Check daily data
     daily = data['daily']
     assert 'time' in daily
-    assert 'temperature_2m_max' in daily
-    assert 'temperature_2m_min' in daily
-    assert 'relative_humidity_2m_mean' in daily
-    assert 'surface_pressure_mean' in daily
-    assert 'precipitation_sum' in daily
-    assert 'wind_speed_10m_max' in daily
-    assert 'sunshine_duration' in daily
+    for field in DAILY_FIELDS:
+        assert field in daily
 
     # Check units
     units = data['daily_units']
@@ -92,23 +88,11 @@ def test_open_meteo_api_response_structure():
     assert units['temperature_2m_max'] == '°C'
 
 
-def test_open_meteo_calgary_coordinates():
+def test_open_meteo_calgary_coordinates(om_full_response):
     """Test Open-Meteo API with Eau Claire, Calgary coordinates."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
+    assert om_full_response.status_code == 200
 
-    params = {
-        'latitude': 51.05306,
-        'longitude': -114.07139,
-        'start_date': '2026-01-20',
-        'end_date': '2026-01-22',
-        'daily': 'temperature_2m_max,temperature_2m_min',
-        'timezone': 'America/Edmonton'
-    }
-
-    response = _make_request_with_retry(url, params)
-    assert response.status_code == 200
-
-    data = response.json()
+    data = om_full_response.json()
 
     # Verify coordinates are close to requested
     assert abs(data['latitude'] - 51.05306) < 0.1
@@ -121,47 +105,28 @@ def test_open_meteo_calgary_coordinates():
     assert len(data['daily']['time']) == 3
 
 
-def test_open_meteo_data_quality():
+def test_open_meteo_data_quality(om_full_response):
     """Test Open-Meteo returns reasonable weather data for Calgary."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
+    assert om_full_response.status_code == 200
 
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    daily = om_full_response.json()['daily']
 
-    params = {
-        'latitude': 51.05306,
-        'longitude': -114.07139,
-        'start_date': yesterday,
-        'end_date': yesterday,
-        'daily': 'temperature_2m_max,temperature_2m_min,relative_humidity_2m_mean',
-        'timezone': 'America/Edmonton'
-    }
-
-    response = requests.get(url, params=params, timeout=10)
-    assert response.status_code == 200
-
-    data = response.json()
-    daily = data['daily']
-
-    # Check data exists
-    assert len(daily['temperature_2m_max']) == 1
-    assert len(daily['temperature_2m_min']) == 1
-    assert len(daily['relative_humidity_2m_mean']) == 1
-
-    temp_max = daily['temperature_2m_max'][0]
-    temp_min = daily['temperature_2m_min'][0]
-    humidity = daily['relative_humidity_2m_mean'][0]
+    # Check data exists for every day
+    assert len(daily['temperature_2m_max']) == 3
+    assert len(daily['temperature_2m_min']) == 3
+    assert len(daily['relative_humidity_2m_mean']) == 3
 
     # Sanity checks for Calgary weather
-    assert -50 <= temp_max <= 40  # °C
-    assert -50 <= temp_min <= 40
-    assert temp_min <= temp_max
-    assert 0 <= humidity <= 100
+    for temp_max, temp_min, humidity in zip(
+            daily['temperature_2m_max'], daily['temperature_2m_min'], daily['relative_humidity_2m_mean']):
+        assert -50 <= temp_max <= 40  # °C
+        assert -50 <= temp_min <= 40
+        assert temp_min <= temp_max
+        assert 0 <= humidity <= 100
 
 
-def test_open_meteo_error_handling():
+def test_open_meteo_error_handling(open_meteo_http):
     """Test Open-Meteo API error responses."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
-
     # Test with invalid coordinates
     params = {
         'latitude': 999,  # Invalid
@@ -171,25 +136,8 @@ def test_open_meteo_error_handling():
         'daily': 'temperature_2m_max'
     }
 
-    response = requests.get(url, params=params, timeout=10)
+    response = _make_request_with_retry(open_meteo_http, ARCHIVE_URL, params, timeout=10)
     assert response.status_code == 400
 
     data = response.json()
     assert 'error' in data or 'reason' in data
-
-
-def test_open_meteo_no_api_key_required():
-    """Test Open-Meteo API works without authentication."""
-    url = "https://archive-api.open-meteo.com/v1/archive"
-
-    params = {
-        'latitude': 51.05,
-        'longitude': -114.07,
-        'start_date': '2026-01-20',
-        'end_date': '2026-01-20',
-        'daily': 'temperature_2m_max'
-    }
-
-    # No API key or authentication headers
-    response = requests.get(url, params=params, timeout=10)
-    assert response.status_code == 200
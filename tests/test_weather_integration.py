@@ -1,7 +1,6 @@
 """Integration tests for weather data collection."""
 import pytest
-import boto3
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from integrations.open_meteo import OpenMeteoWeatherIntegration
 from utils.db import MetricsDB
 
@@ -12,28 +11,24 @@ def db():
     return MetricsDB()
 
 
-def test_weather_end_to_end(db):
+def test_weather_end_to_end(db, metrics_table, yesterday_utc):
     """Test complete weather data collection and storage."""
     user_id = 'test-weather-user'
     integration = OpenMeteoWeatherIntegration(user_id)
 
     # Fetch yesterday's weather
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
 
-    data_points = integration.fetch_data(since=yesterday, until=yesterday)
+    data_points = integration.fetch_data(since=yesterday_utc, until=yesterday_utc)
     assert len(data_points) == 1
 
     # Store in DynamoDB
     db.store_metrics(user_id, 'weather', data_points)
 
     # Verify storage
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table('life-stats-metrics')
-
-    response = table.get_item(
+    response = metrics_table.get_item(
         Key={
             'user_id': user_id,
-            'metric_date': f"{yesterday}#weather"
+            'metric_date': f"{yesterday_utc}#weather"
         }
     )
 
@@ -42,7 +37,7 @@ def test_weather_end_to_end(db):
 
     assert item['user_id'] == user_id
     assert item['metric_type'] == 'weather'
-    assert item['date'] == yesterday
+    assert item['date'] == yesterday_utc
     assert 'value' in item
 
     # Check value structure
@@ -71,45 +66,37 @@ def test_weather_last_run_tracking(db):
     assert (now - last_run_time).total_seconds() < 60
 
 
-def test_weather_data_overwrite(db):
+def test_weather_data_overwrite(db, metrics_table, yesterday_utc):
     """Test that re-fetching weather data overwrites previous values."""
     user_id = 'test-weather-user'
     integration = OpenMeteoWeatherIntegration(user_id)
 
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
-
     # Fetch and store once
-    data_points = integration.fetch_data(since=yesterday, until=yesterday)
+    data_points = integration.fetch_data(since=yesterday_utc, until=yesterday_utc)
     db.store_metrics(user_id, 'weather', data_points)
 
     # Fetch and store again
-    data_points_2 = integration.fetch_data(since=yesterday, until=yesterday)
+    data_points_2 = integration.fetch_data(since=yesterday_utc, until=yesterday_utc)
     db.store_metrics(user_id, 'weather', data_points_2)
 
+    from boto3.dynamodb.conditions import Key
+
     # Verify only one record exists
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table('life-stats-metrics')
-
-    response = table.query(
-        KeyConditionExpression='user_id = :uid AND begins_with(metric_date, :date)',
-        ExpressionAttributeValues={
-            ':uid': user_id,
-            ':date': f"{yesterday}#weather"
-        }
+    response = metrics_table.query(
+        KeyConditionExpression=Key('user_id').eq(user_id) & Key('metric_date').begins_with(f"{yesterday_utc}#weather")
     )
 
     # Should have exactly one item
     assert response['Count'] == 1
 
 
-def test_weather_multiple_days(db):
+def test_weather_multiple_days(db, dynamodb_resource, metrics_table, last_5_days):
     """Test fetching and storing multiple days of weather data."""
     user_id = 'test-weather-user'
     integration = OpenMeteoWeatherIntegration(user_id)
 
     # Fetch last 5 days
-    end_date = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
-    start_date = (datetime.now(timezone.utc) - timedelta(days=5)).strftime('%Y-%m-%d')
+    start_date, end_date = last_5_days
 
     data_points = integration.fetch_data(since=start_date, until=end_date)
     assert len(data_points) == 5
@@ -117,15 +104,9 @@ def test_weather_multiple_days(db):
     # Store all
     db.store_metrics(user_id, 'weather', data_points)
 
-    # Verify all stored
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table('life-stats-metrics')
-
-    for point in data_points:
-        response = table.get_item(
-            Key={
-                'user_id': user_id,
-                'metric_date': f"{point['date']}#weather"
-            }
-        )
-        assert 'Item' in response
+    # Verify all stored, reading every day back in one BatchGetItem
+    keys = [{'user_id': user_id, 'metric_date': f"{point['date']}#weather"} for point in data_points]
+    response = dynamodb_resource.batch_get_item(RequestItems={metrics_table.name: {'Keys': keys}})
+    assert not response['UnprocessedKeys']
+    stored = {item['metric_date'] for item in response['Responses'][metrics_table.name]}
+    assert stored == {key['metric_date'] for key in keys}
@@ -3,35 +3,20 @@
 These tests make actual API calls and should be run separately from unit tests.
 Skip in CI by default to avoid network dependencies.
 """
-import sys
-from pathlib import Path
 import os
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-
 import pytest
-from datetime import datetime, timezone, timedelta
-from integrations.open_meteo import OpenMeteoWeatherIntegration
 
 
-@pytest.mark.skipif(
-    os.environ.get('SKIP_INTEGRATION_TESTS', 'true').lower() == 'true',
-    reason="Integration tests disabled (set SKIP_INTEGRATION_TESTS=false to enable)"
-)
-def test_weather_real_api_call():
-    """Test actual API call to Open-Meteo (integration test)."""
-    integration = OpenMeteoWeatherIntegration('test-user')
+# Parsed once for every integration test in the module; enable with SKIP_INTEGRATION_TESTS=false
+SKIP_INTEGRATION = os.environ.get('SKIP_INTEGRATION_TESTS', 'true').lower() == 'true'
 
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
 
-    try:
-        data_points = integration.fetch_data(since=yesterday, until=yesterday)
-    except Exception as e:
-        pytest.skip(f"API unavailable: {e}")
-
-    assert len(data_points) == 1
-    value = data_points[0]['value']
+@pytest.mark.skipif(SKIP_INTEGRATION, reason="Integration tests disabled (set SKIP_INTEGRATION_TESTS=false to enable)")
+def test_weather_real_api_call(yesterday_weather):
+    """Test actual API call to Open-Meteo (integration test)."""
+    assert len(yesterday_weather) == 1
+    value = yesterday_weather[0]['value']
 
     # Verify all expected fields are present
     assert 'temp_max' in value
@@ -43,23 +28,11 @@ def test_weather_real_api_call():
     assert 'sunshine_duration' in value
 
 
-@pytest.mark.skipif(
-    os.environ.get('SKIP_INTEGRATION_TESTS', 'true').lower() == 'true',
-    reason="Integration tests disabled"
-)
-def test_weather_data_sanity_checks():
+@pytest.mark.skipif(SKIP_INTEGRATION, reason="Integration tests disabled")
+def test_weather_data_sanity_checks(yesterday_weather):
     """Test real weather data is within reasonable ranges."""
-    integration = OpenMeteoWeatherIntegration('test-user')
-
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
-
-    try:
-        data_points = integration.fetch_data(since=yesterday, until=yesterday)
-    except Exception as e:
-        pytest.skip(f"API unavailable: {e}")
-
-    assert len(data_points) == 1
-    value = data_points[0]['value']
+    assert len(yesterday_weather) == 1
+    value = yesterday_weather[0]['value']
 
     # Calgary temperature ranges - convert Decimal to float
     temp_max = float(value['temp_max'])
@@ -81,19 +54,14 @@ def test_weather_data_sanity_checks():
     assert sunshine >= 0  # seconds
 
 
-@pytest.mark.skipif(
-    os.environ.get('SKIP_INTEGRATION_TESTS', 'true').lower() == 'true',
-    reason="Integration tests disabled"
-)
-def test_weather_date_range():
+@pytest.mark.skipif(SKIP_INTEGRATION, reason="Integration tests disabled")
+def test_weather_date_range(weather_integration):
     """Test weather data fetch respects date range."""
-    integration = OpenMeteoWeatherIntegration('test-user')
-
     start = '2026-01-20'
     end = '2026-01-22'
 
     try:
-        data_points = integration.fetch_data(since=start, until=end)
+        data_points = weather_integration.fetch_data(since=start, until=end)
     except Exception as e:
         pytest.skip(f"API unavailable: {e}")
 
@@ -1,117 +1,238 @@
 """Functional tests for Open-Meteo weather integration (mocked)."""
-import sys
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 import pytest
-from unittest.mock import Mock, patch
-from decimal import Decimal
-from integrations.open_meteo import OpenMeteoWeatherIntegration
+from types import SimpleNamespace
+
+
+def _json_response(payload):
+    """Minimal 200 response returning ``payload`` from json(); cheaper to build than a Mock."""
+    return SimpleNamespace(status_code=200, headers={}, raise_for_status=lambda: None,
+                           json=lambda **kwargs: payload)
+
+
+# Canned archive bodies, built once at import; tuples keep the shared columns immutable
+_SINGLE_DAY_RESPONSE = {
+    'daily': {
+        'time': ('2026-01-30',),
+        'temperature_2m_max': (5.0,),
+        'temperature_2m_min': (-2.0,),
+        'relative_humidity_2m_mean': (70.0,),
+        'surface_pressure_mean': (1013.0,),
+        'precipitation_sum': (0.0,),
+        'wind_speed_10m_max': (15.0,),
+        'sunshine_duration': (3600.0,)
+    }
+}
+
+_THREE_DAY_RESPONSE = {
+    'daily': {
+        'time': ('2026-01-20', '2026-01-21', '2026-01-22'),
+        'temperature_2m_max': (5.0, 6.0, 7.0),
+        'temperature_2m_min': (-2.0, -1.0, 0.0),
+        'relative_humidity_2m_mean': (70.0, 71.0, 72.0),
+        'surface_pressure_mean': (1013.0, 1014.0, 1015.0),
+        'precipitation_sum': (0.0, 0.0, 0.0),
+        'wind_speed_10m_max': (15.0, 16.0, 17.0),
+        'sunshine_duration': (3600.0, 3700.0, 3800.0)
+    }
+}
+
+_EXPECTED_POINT_KEYS = frozenset({'date', 'value', 'timestamp'})
+_EXPECTED_VALUE_KEYS = frozenset({
+    'temp_max', 'temp_min', 'humidity_mean', 'pressure_mean', 'precipitation', 'wind_max', 'sunshine_duration'
+})
+
+
+@pytest.fixture
+def session_get(monkeypatch):
+    """
+    Replace Session.get with a plain recording function, skipping patch's MagicMock.
+
+    Queue what each call should return (or raise) in ``responses``; ``calls`` holds each call's kwargs.
+    """
+    fake = SimpleNamespace(calls=[], responses=[])
+
+    def get(session, url, **kwargs):
+        fake.calls.append(kwargs)
+        response = fake.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr('integrations.open_meteo.requests.Session.get', get)
+    return fake
+
+
+@pytest.fixture(scope='module')
+def integration():
+    """One integration shared by the module's mocked tests; none of them change its state."""
+    from integrations.open_meteo import OpenMeteoWeatherIntegration
+    return OpenMeteoWeatherIntegration('test-user')
 
 
 def test_weather_integration_initialization():
     """Test weather integration can be initialized."""
+    from integrations.open_meteo import OpenMeteoWeatherIntegration
+
     integration = OpenMeteoWeatherIntegration('test-user')
     assert integration.user_id == 'test-user'
     assert integration.LATITUDE == 51.05306
     assert integration.LONGITUDE == -114.07139
 
 
-@patch('integrations.open_meteo.requests.Session.get')
-def test_weather_fetch_data_structure(mock_get):
-    """Test weather data fetch returns correct structure with mocked API."""
-    # Mock API response
-    mock_response = Mock()
-    mock_response.json.return_value = {
-        'daily': {
-            'time': ['2026-01-30'],
-            'temperature_2m_max': [5.0],
-            'temperature_2m_min': [-2.0],
-            'relative_humidity_2m_mean': [70.0],
-            'surface_pressure_mean': [1013.0],
-            'precipitation_sum': [0.0],
-            'wind_speed_10m_max': [15.0],
-            'sunshine_duration': [3600.0]
-        }
-    }
-    mock_get.return_value = mock_response
+def test_weather_integrations_share_one_session():
+    """Test every integration reuses the module's pooled session instead of building its own."""
+    from integrations import open_meteo
 
-    integration = OpenMeteoWeatherIntegration('test-user')
-    data_points = integration.fetch_data(since='2026-01-30', until='2026-01-30')
+    first = open_meteo.OpenMeteoWeatherIntegration('test-user')
+    second = open_meteo.OpenMeteoWeatherIntegration('other-user')
+
+    assert first.session is second.session is open_meteo._get_session()
 
-    assert len(data_points) == 1
 
-    # Check structure
-    point = data_points[0]
-    assert 'date' in point
-    assert 'value' in point
-    assert 'timestamp' in point
+@pytest.mark.parametrize('payload,since,until', [
+    (_SINGLE_DAY_RESPONSE, '2026-01-30', '2026-01-30'),
+    (_THREE_DAY_RESPONSE, '2026-01-20', '2026-01-22'),
+])
+def test_weather_fetch_data(session_get, integration, payload, since, until):
+    """Test a mocked fetch sends the requested range and returns one well-formed point per day."""
+    from decimal import Decimal
 
-    # Check value structure
-    value = point['value']
-    assert 'temp_max' in value
-    assert 'temp_min' in value
-    assert 'humidity_mean' in value
-    assert 'pressure_mean' in value
-    assert 'precipitation' in value
-    assert 'wind_max' in value
-    assert 'sunshine_duration' in value
+    session_get.responses.append(_json_response(payload))
+
+    data_points = integration.fetch_data(since=since, until=until)
+
+    # Verify API was called with correct parameters
+    assert len(session_get.calls) == 1
+    params = session_get.calls[0]['params']
+
+    assert params['start_date'] == since
+    assert params['end_date'] == until
+    assert params['latitude'] == 51.05306
+    assert params['longitude'] == -114.07139
+
+    # Verify returned data
+    assert tuple(point['date'] for point in data_points) == payload['daily']['time']
 
-    # Verify values are Decimal type
-    assert isinstance(value['temp_max'], Decimal)
-    assert isinstance(value['pressure_mean'], Decimal)
+    for point in data_points:
+        assert _EXPECTED_POINT_KEYS <= point.keys()
 
+        # Check value structure
+        value = point['value']
+        assert _EXPECTED_VALUE_KEYS <= value.keys()
 
-@patch('integrations.open_meteo.requests.Session.get')
-def test_weather_api_error_handling(mock_get):
+        # Verify values are Decimal type
+        assert isinstance(value['temp_max'], Decimal)
+        assert isinstance(value['pressure_mean'], Decimal)
+
+
+def test_weather_api_error_handling(session_get, integration):
     """Test weather integration handles API errors gracefully."""
     # Mock API error
-    mock_get.side_effect = Exception("API Error")
-
-    integration = OpenMeteoWeatherIntegration('test-user')
+    session_get.responses.append(Exception("API Error"))
 
-    with pytest.raises(Exception) as exc_info:
+    with pytest.raises(Exception, match="API Error"):
         integration.fetch_data(since='2026-01-30')
 
-    assert "API Error" in str(exc_info.value)
-
-
-@patch('integrations.open_meteo.requests.Session.get')
-def test_weather_date_range_parameters(mock_get):
-    """Test that correct date parameters are sent to API."""
-    mock_response = Mock()
-    mock_response.json.return_value = {
-        'daily': {
-            'time': ['2026-01-20', '2026-01-21', '2026-01-22'],
-            'temperature_2m_max': [5.0, 6.0, 7.0],
-            'temperature_2m_min': [-2.0, -1.0, 0.0],
-            'relative_humidity_2m_mean': [70.0, 71.0, 72.0],
-            'surface_pressure_mean': [1013.0, 1014.0, 1015.0],
-            'precipitation_sum': [0.0, 0.0, 0.0],
-            'wind_speed_10m_max': [15.0, 16.0, 17.0],
-            'sunshine_duration': [3600.0, 3700.0, 3800.0]
-        }
-    }
-    mock_get.return_value = mock_response
 
-    integration = OpenMeteoWeatherIntegration('test-user')
-    data_points = integration.fetch_data(since='2026-01-20', until='2026-01-22')
+@pytest.mark.parametrize('daily', [
+    {**_SINGLE_DAY_RESPONSE['daily'], 'sunshine_duration': ()},
+    {key: column for key, column in _THREE_DAY_RESPONSE['daily'].items() if key != 'surface_pressure_mean'},
+])
+def test_weather_malformed_response_raises(session_get, integration, daily):
+    """Test a short or missing daily column fails the fetch instead of silently dropping days."""
+    session_get.responses.append(_json_response({'daily': daily}))
 
-    # Verify API was called with correct parameters
-    mock_get.assert_called_once()
-    call_args = mock_get.call_args
-    params = call_args[1]['params']
+    with pytest.raises((ValueError, KeyError)):
+        integration.fetch_data(since=daily['time'][0], until=daily['time'][-1])
+
+
+def test_weather_accepts_parsed_datetimes(session_get, integration):
+    """Test datetimes resolved by the handler produce the same request as date strings."""
+    from integrations.base import parse_since, parse_until
+
+    session_get.responses.append(_json_response({'daily': {'time': []}}))
+
+    integration.fetch_data(since=parse_since('2026-01-20'), until=parse_until('2026-01-22'))
 
+    params = session_get.calls[0]['params']
     assert params['start_date'] == '2026-01-20'
     assert params['end_date'] == '2026-01-22'
-    assert params['latitude'] == 51.05306
-    assert params['longitude'] == -114.07139
 
-    # Verify returned data
-    assert len(data_points) == 3
-    dates = [point['date'] for point in data_points]
-    assert '2026-01-20' in dates
-    assert '2026-01-21' in dates
-    assert '2026-01-22' in dates
+
+def test_weather_parses_floats_as_decimal(session_get, integration):
+    """Test the raw JSON body is decoded with floats as exact Decimals."""
+    from decimal import Decimal
+    import requests
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (
+        b'{"daily": {"time": ["2026-01-20"], "temperature_2m_max": [5.1], "temperature_2m_min": [-2.3],'
+        b' "relative_humidity_2m_mean": [70], "surface_pressure_mean": [1013.2], "precipitation_sum": [0.0],'
+        b' "wind_speed_10m_max": [15.4], "sunshine_duration": [null]}}'
+    )
+    session_get.responses.append(response)
+
+    value = integration.fetch_data(since='2026-01-20', until='2026-01-20')[0]['value']
+
+    assert value['temp_max'] == Decimal('5.1')
+    assert value['humidity_mean'] == Decimal('70')
+    assert value['sunshine_duration'] == Decimal('0')
+
+
+def test_weather_revalidates_cached_response(session_get, integration, tmp_path, monkeypatch):
+    """Test a repeated range is revalidated with its ETag and served from /tmp on 304."""
+    from decimal import Decimal
+    import requests
+
+    monkeypatch.setattr('integrations.open_meteo.tempfile.gettempdir', lambda: str(tmp_path))
+    first = requests.Response()
+    first.status_code = 200
+    first.headers['ETag'] = '"v1"'
+    first._content = (
+        b'{"daily": {"time": ["2026-01-20"], "temperature_2m_max": [5.1], "temperature_2m_min": [-2.3],'
+        b' "relative_humidity_2m_mean": [70], "surface_pressure_mean": [1013.2], "precipitation_sum": [0.0],'
+        b' "wind_speed_10m_max": [15.4], "sunshine_duration": [3600.0]}}'
+    )
+    not_modified = requests.Response()
+    not_modified.status_code = 304
+    session_get.responses.extend([first, not_modified])
+
+    fresh = integration.fetch_data(since='2026-01-20', until='2026-01-20')
+    cached = integration.fetch_data(since='2026-01-20', until='2026-01-20')
+
+    assert session_get.calls[0]['headers'] is None
+    assert session_get.calls[1]['headers'] == {'If-None-Match': '"v1"'}
+    assert cached[0]['value'] == fresh[0]['value']
+    assert cached[0]['value']['temp_max'] == Decimal('5.1')
+
+
+def test_weather_cache_key_covers_every_param(integration):
+    """Test requests for the same range but different coordinates or fields do not share a cache entry."""
+    params = {'latitude': 51.05, 'longitude': -114.07, 'start_date': '2026-01-20', 'end_date': '2026-01-20',
+              'daily': ['temperature_2m_max'], 'timezone': 'America/Edmonton'}
+
+    paths = {
+        integration._cache_path(params),
+        integration._cache_path({**params, 'latitude': 53.55}),
+        integration._cache_path({**params, 'timezone': 'UTC'}),
+        integration._cache_path({**params, 'daily': ['temperature_2m_min']}),
+    }
+
+    assert len(paths) == 4
+
+
+def test_weather_cache_write_prunes_oldest_entries(integration, tmp_path, monkeypatch):
+    """Test writing a cached response keeps only the most recent entries and leaves no temp files."""
+    import os
+
+    monkeypatch.setattr('integrations.open_meteo._CACHE_MAX_ENTRIES', 2)
+    for age, name in enumerate(('openmeteo_old.json', 'openmeteo_older.json')):
+        path = tmp_path / name
+        path.write_text('{}')
+        os.utime(path, (1000 - age, 1000 - age))
+
+    integration._write_cache(str(tmp_path / 'openmeteo_new.json'), '"v1"', '{}')
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['openmeteo_new.json', 'openmeteo_old.json']